@@ -0,0 +1,6 @@
+import logging
+
+
+# library is quiet by default, applications decide where its logs go, i.e.
+# logging.basicConfig(level=logging.INFO) shows conversion summaries
+logging.getLogger(__name__).addHandler(logging.NullHandler())
@@ -0,0 +1,171 @@
+import argparse
+import numpy as np
+from lix.convert import BatchConverter
+from lix.csv_writer import CSV_COLUMNS, CSV_TITLE_EPOCH
+from lix.header import get_calibration
+from lix.stream import LidStream, BATCH_SIZE
+from lix.utils import time_to_iso8601_array
+
+
+
+# columns summarized by default, per logger type
+AGG_COLUMNS = {
+    'TDO': ['vt', 'cpd'],
+    'CTD': ['vt', 'cpd', 'sal'],
+    'DO1': ['dos', 'dop', 'dot'],
+    'DO2': ['dos', 'dop', 'dot', 'wat'],
+}
+AGG_STATS = ('min', 'mean', 'max')
+
+
+
+class Aggregator:
+    # min, mean and max of columns per time bucket, fed batch by batch,
+    # times never go back so buckets are runs of consecutive samples,
+    # NaN values, i.e. salinity out of range, do not count
+    def __init__(self, bucket, columns):
+        # bucket: seconds, buckets start at multiples of it since 1970
+        self.bucket = bucket
+        self.columns = columns
+        # last bucket of previous batch, it may go on in the next one
+        self._open = None
+
+    def _reduce(self, d):
+        t = d['time']
+        b = t - t % self.bucket
+        i = np.concatenate(([0], np.flatnonzero(np.diff(b)) + 1))
+        r = {
+            'time': b[i],
+            'n': np.diff(np.append(i, len(t))),
+        }
+        for k in self.columns:
+            v = d[k].astype(np.float64)
+            m = np.isnan(v)
+            r[f'{k}_min'] = np.fmin.reduceat(v, i)
+            r[f'{k}_max'] = np.fmax.reduceat(v, i)
+            r[f'{k}_sum'] = np.add.reduceat(np.where(m, 0, v), i)
+            r[f'{k}_n'] = np.add.reduceat(~m, i, dtype=np.int64)
+        return r
+
+    def _finish(self, r):
+        rv = {'time': r['time'], 'n': r['n']}
+        for k in self.columns:
+            rv[f'{k}_min'] = r[f'{k}_min']
+            n = r[f'{k}_n']
+            rv[f'{k}_mean'] = r[f'{k}_sum'] / np.where(n, n, 1)
+            rv[f'{k}_mean'][n == 0] = np.nan
+            rv[f'{k}_max'] = r[f'{k}_max']
+        return rv
+
+    def add(self, d):
+        # d: converted batch, returns its buckets already complete
+        if not len(d['time']):
+            return None
+        r = self._reduce(d)
+        o = self._open
+        if o is not None:
+            if o['time'][0] == r['time'][0]:
+                r['n'][0] += o['n'][0]
+                for k in self.columns:
+                    r[f'{k}_min'][0] = np.fmin(r[f'{k}_min'][0], o[f'{k}_min'][0])
+                    r[f'{k}_max'][0] = np.fmax(r[f'{k}_max'][0], o[f'{k}_max'][0])
+                    r[f'{k}_sum'][0] += o[f'{k}_sum'][0]
+                    r[f'{k}_n'][0] += o[f'{k}_n'][0]
+            else:
+                r = {k: np.concatenate((o[k], v)) for k, v in r.items()}
+        self._open = {k: v[-1:] for k, v in r.items()}
+        return self._finish({k: v[:-1] for k, v in r.items()})
+
+    def flush(self):
+        # returns the last bucket, call it once no more batches come
+        o = self._open
+        self._open = None
+        return self._finish(o) if o is not None else None
+
+
+
+class AggregateCsvWriter:
+    # one row per bucket, each column as min, mean and max
+    def __init__(self, fo, columns, time_fmt='iso'):
+        self.fo = fo
+        self.columns = columns
+        self.time_fmt = time_fmt
+        t = CSV_TITLE_EPOCH if time_fmt == 'epoch' else CSV_COLUMNS['time'][0]
+        self.titles = [t, 'samples']
+        fmt = ['%d' if time_fmt == 'epoch' else '%s', '%d']
+        for k in columns:
+            for s in AGG_STATS:
+                self.titles.append(f'{CSV_COLUMNS[k][0]} {s}')
+                fmt.append(CSV_COLUMNS[k][1] or '%.3f')
+        self.template = ','.join(fmt) + '\n'
+        self.names = ['time', 'n'] + [f'{k}_{s}' for k in columns
+                                      for s in AGG_STATS]
+
+    def write_header(self):
+        self.fo.write(','.join(self.titles) + '\n')
+
+    def write(self, r):
+        if r is None or not len(r['time']):
+            return
+        cols = [r[k].tolist() for k in self.names]
+        if self.time_fmt != 'epoch':
+            cols[0] = time_to_iso8601_array(r['time']).tolist()
+        tpl = self.template
+        self.fo.write(''.join([tpl % x for x in zip(*cols)]))
+
+
+
+def aggregate_lid(src, bucket=60, columns=None, out=None, time_fmt='iso',
+                  batch_size=BATCH_SIZE):
+    # src: path, bytes or file object, see LidStream
+    # bucket: seconds, columns: None means AGG_COLUMNS of the logger type
+    # out: CSV summary to write, no full-rate table is ever built
+    # returns dictionary of arrays, one row per bucket
+    ls = []
+    fo = None
+    try:
+        with LidStream(src) as st:
+            columns = columns or AGG_COLUMNS[st.glt]
+            bc = BatchConverter(st.glt, st.epoch, get_calibration(st.header))
+            ag = Aggregator(bucket, columns)
+            if out:
+                fo = open(out, 'w')
+                w = AggregateCsvWriter(fo, columns, time_fmt)
+                w.write_header()
+            for d in st.batches(batch_size):
+                ls.append(ag.add(bc.convert(d)))
+                if fo:
+                    w.write(ls[-1])
+            ls.append(ag.flush())
+            if fo:
+                w.write(ls[-1])
+    finally:
+        if fo:
+            fo.close()
+
+    ls = [r for r in ls if r is not None]
+    if not ls:
+        return {}
+    return {k: np.concatenate([r[k] for r in ls]) for k in ls[0]}
+
+
+
+def main():
+    ap = argparse.ArgumentParser(description='time-bucketed LID file summary')
+    ap.add_argument('paths', nargs='+', help='.lid files')
+    ap.add_argument('-b', '--bucket', type=int, default=60,
+                    help='bucket length in seconds')
+    ap.add_argument('--columns', nargs='+', default=None,
+                    help='columns to summarize, i.e. vt cpd sal')
+    ap.add_argument('--time-fmt', default='iso', choices=('iso', 'epoch'))
+    args = ap.parse_args()
+    for p in args.paths:
+        out = p.replace('.lid', f'_{args.bucket}s.csv')
+        r = aggregate_lid(p, args.bucket, args.columns, out, args.time_fmt)
+        print(f"{out}, {len(r.get('time', []))} buckets")
+    return 0
+
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,159 @@
+import argparse
+import glob
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from lix.cache import clear_cache
+from lix.compress import COMPRESSION
+from lix.derived import DERIVED_CHANNELS
+from lix.lix import LidParser
+
+
+
+# by name, run as python -m lix.batch it would be __main__, not under lix
+log = logging.getLogger('lix.batch')
+
+
+
+def _result(p, error=''):
+    # what conversion of one file reports, a failed one until it is done
+    return {
+        'path': p,
+        'rv': 1,
+        'n_samples': 0,
+        'seconds': 0,
+        'cached': False,
+        'metrics': None,
+        'error': error,
+    }
+
+
+
+def _convert_one(p, engine='numpy', verbose=False, fmt='csv', cache=False,
+                 force=False, compression=None, derived=None):
+    # runs in a worker process, never raises so batch goes on
+    rv = _result(p)
+    if verbose:
+        # workers may not inherit logging configuration of main process
+        logging.basicConfig(level=logging.INFO)
+    t0 = time.perf_counter()
+    try:
+        lp = LidParser()
+        rv['rv'] = lp.parse(p, engine, fmt, cache=cache, force=force,
+                            compression=compression, derived=derived)
+        rv['n_samples'] = lp.n_samples
+        rv['cached'] = lp.cached
+        rv['metrics'] = lp.metrics.to_dict()
+        if rv['rv']:
+            rv['error'] = 'conversion returned error'
+    except (Exception, ) as e:
+        rv['error'] = f'{type(e).__name__}: {e}'
+    rv['seconds'] = time.perf_counter() - t0
+    return rv
+
+
+
+def list_lid_files(folder):
+    return glob.glob(os.path.join(folder, '*.lid'))
+
+
+
+def convert_files(ls, n_workers=None, engine='numpy', verbose=False, fmt='csv',
+                  cache=False, force=False, compression=None, derived=None):
+    # ls: list of .lid file paths
+    # n_workers: processes in the pool, None means one per core
+    # cache: skip files whose outputs are current, force: convert them anyway
+    # compression: None, 'gzip', 'bz2' or 'lzma' for CSV outputs
+    # derived: derived channels to add, i.e. ['depth', 'tilt']
+    t0 = time.perf_counter()
+
+    # largest files first so no worker is left with a big one at the end
+    ls = sorted(ls, key=lambda p: os.path.getsize(p) if os.path.exists(p) else 0,
+                reverse=True)
+
+    rv = []
+    with ProcessPoolExecutor(max_workers=n_workers) as ex:
+        fut = {ex.submit(_convert_one, p, engine, verbose, fmt, cache, force,
+                         compression, derived): p
+               for p in ls}
+        for f in as_completed(fut):
+            # a worker killed, i.e. out of memory, breaks the pool, files
+            # not converted yet are reported failed too
+            try:
+                r = f.result()
+            except (Exception, ) as e:
+                r = _result(fut[f], f'{type(e).__name__}: {e}')
+            if r['error']:
+                log.error(f"error, converting {r['path']} -> {r['error']}")
+            rv.append(r)
+
+    # summary keeps the input order, largest first
+    d = {p: i for i, p in enumerate(ls)}
+    rv.sort(key=lambda r: d[r['path']])
+    return {
+        'files': rv,
+        'n_files': len(rv),
+        'n_errors': len([r for r in rv if r['error']]),
+        'n_cached': len([r for r in rv if r['cached']]),
+        'n_samples': sum(r['n_samples'] for r in rv),
+        'seconds': time.perf_counter() - t0,
+    }
+
+
+
+def convert_folder(folder, n_workers=None, engine='numpy', verbose=False,
+                   fmt='csv', cache=False, force=False, compression=None,
+                   derived=None):
+    return convert_files(list_lid_files(folder), n_workers, engine, verbose,
+                         fmt, cache, force, compression, derived)
+
+
+
+def _print_summary(s):
+    for r in s['files']:
+        e = f" -> {r['error']}" if r['error'] else ''
+        c = ', cached' if r['cached'] else ''
+        print(f"{r['path']}, {r['n_samples']} samples, {r['seconds']:.3f} s{c}{e}")
+    print(f"{s['n_files']} files, {s['n_errors']} errors, {s['n_cached']} cached, "
+          f"{s['n_samples']} samples, {s['seconds']:.3f} s")
+
+
+
+def main():
+    ap = argparse.ArgumentParser(description='convert LID files in parallel')
+    ap.add_argument('paths', nargs='+', help='folders or .lid files')
+    ap.add_argument('-j', '--workers', type=int, default=None,
+                    help='number of processes, default one per core')
+    ap.add_argument('--engine', default='numpy', choices=('numpy', 'sample'))
+    ap.add_argument('--fmt', default='csv', choices=('csv', 'npy'))
+    ap.add_argument('--compression', default=None, choices=list(COMPRESSION),
+                    help='compress CSV outputs while writing them')
+    ap.add_argument('--derived', nargs='+', default=None,
+                    choices=list(DERIVED_CHANNELS),
+                    help='derived channels to add, i.e. depth tilt')
+    ap.add_argument('--cache', action='store_true',
+                    help='skip files whose outputs are current')
+    ap.add_argument('--force', action='store_true',
+                    help='convert even when outputs are current')
+    ap.add_argument('--clear-cache', action='store_true',
+                    help='forget previous conversions in these folders')
+    ap.add_argument('-v', '--verbose', action='store_true')
+    args = ap.parse_args()
+
+    if args.clear_cache:
+        for p in args.paths:
+            clear_cache(p if os.path.isdir(p) else os.path.dirname(p))
+
+    ls = []
+    for p in args.paths:
+        ls += list_lid_files(p) if os.path.isdir(p) else [p]
+    s = convert_files(ls, args.workers, args.engine, args.verbose, args.fmt,
+                      args.cache, args.force, args.compression, args.derived)
+    _print_summary(s)
+    return 1 if s['n_errors'] else 0
+
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
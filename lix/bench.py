@@ -0,0 +1,171 @@
+import argparse
+import filecmp
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from lix.csv_writer import CSV_COLUMN_SETS
+from lix.lix import LidParser, do16_to_float
+from lix.synthetic import RATE_EXTENDED, synthetic_samples, write_synthetic_lid
+
+
+
+# logger types and file versions, sizes in samples, a trailing 'm' means
+# mixed masks, half of the samples with 2-byte ones, worst case of scanning
+BENCH_CASES = ('TDO2', 'TDO2m', 'CTD2', 'CTD3', 'DO12', 'DO23')
+BENCH_SIZES = (10000, 100000)
+BENCH_RATE_MIXED = 0.5
+# per-sample engine reads mini-header bytes of DO1 samples straddling
+# chunks, so these are checked against the synthetic values instead
+_CHECK_SYNTHETIC = ('DO1', )
+
+
+
+def _peak_mb():
+    # ru_maxrss is in KB on linux, bytes on macOS
+    m = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return m / (1 << 20) if sys.platform == 'darwin' else m / (1 << 10)
+
+
+
+def _run(p, engine, fmt):
+    # runs in a fresh process, so peak memory is the one of this conversion
+    lp = LidParser()
+    t0 = time.perf_counter()
+    rv = lp.parse(p, engine, fmt)
+    return {
+        'rv': rv,
+        'seconds': time.perf_counter() - t0,
+        'peak_mb': _peak_mb(),
+        'n_samples': lp.n_samples,
+        'outputs': lp.outputs,
+    }
+
+
+
+def _run_fresh(p, engine, fmt):
+    ctx = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as ex:
+        return ex.submit(_run, p, engine, fmt).result()
+
+
+
+def _check_synthetic(glt, r, n, seed, spt, rate):
+    # CSV values must be the ones of the samples the file was made of,
+    # decoded one by one, not with the array code under test
+    a, _ = synthetic_samples(glt, n, np.random.default_rng(seed), spt, rate)
+    ls = [o for o in r['outputs'] if o.endswith('.csv')]
+    with open(ls[0]) as f:
+        rows = [x.rstrip('\n').split(',') for x in f.readlines()[1:]]
+    if len(rows) != n:
+        return 'DIFFERENT'
+    for i, k in enumerate(CSV_COLUMN_SETS[(glt, 'compact')]):
+        if k == 'time':
+            continue
+        v = ['{:.2f}'.format(do16_to_float(int(x))) for x in a[k]]
+        if [x[i] for x in rows] != v:
+            return 'DIFFERENT'
+    return 'same'
+
+
+
+def _check(p, glt, r, reference, fmt, n, seed, spt, rate):
+    # converts again with reference engine, outputs must be the same bytes
+    if fmt != 'csv':
+        return 'n/a'
+    if glt in _CHECK_SYNTHETIC and reference == 'sample':
+        return _check_synthetic(glt, r, n, seed, spt, rate)
+    # only CSV ones, statistics means may differ in their last digits
+    ls = [o for o in r['outputs'] if o.endswith('.csv')]
+    keep = [o + '.bench' for o in ls]
+    for o, k in zip(ls, keep):
+        os.replace(o, k)
+    r_ref = _run_fresh(p, reference, fmt)
+    ls_ref = [o for o in r_ref['outputs'] if o.endswith('.csv')]
+    same = all(filecmp.cmp(o, k, shallow=False) for o, k in zip(ls_ref, keep))
+    return 'same' if same else 'DIFFERENT'
+
+
+
+def run_case(folder, case, n, engine='numpy', fmt='csv', reference=None,
+             seed=0):
+    # case: 'TDO2', 'CTD3'... logger type plus file version, 'TDO2m' mixed
+    # reference: engine to compare output with, None means no check
+    glt, ver = case[:3], int(case[3:].rstrip('m'))
+    rate = BENCH_RATE_MIXED if case.endswith('m') else RATE_EXTENDED
+    p = os.path.join(folder, f'{case}_{n}.lid')
+    spt = 60 if glt.startswith('DO') else 1
+    write_synthetic_lid(p, glt, ver, n, seed, spt, rate)
+    mb = os.path.getsize(p) / 1e6
+
+    r = _run_fresh(p, engine, fmt)
+    s = r['seconds']
+    return {
+        'case': case,
+        'n': n,
+        'mb': mb,
+        'seconds': s,
+        'samples_per_s': r['n_samples'] / s if s else 0,
+        'mb_per_s': mb / s if s else 0,
+        'peak_mb': r['peak_mb'],
+        'check': _check(p, glt, r, reference, fmt, n, seed, spt, rate)
+                 if reference else '',
+    }
+
+
+
+def run_bench(cases=BENCH_CASES, sizes=BENCH_SIZES, engine='numpy',
+              fmt='csv', reference='sample', folder=None):
+    # returns one result per case and size, synthetic files are removed
+    # unless a folder to keep them in is given
+    tmp = None if folder else tempfile.mkdtemp(prefix='lix_bench_')
+    try:
+        return [run_case(folder or tmp, c, n, engine, fmt, reference)
+                for c in cases for n in sizes]
+    finally:
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+
+def _print_results(ls):
+    print(f"{'case':<6}{'samples':>10}{'MB':>9}{'s':>9}{'samples/s':>12}"
+          f"{'MB/s':>9}{'peak MB':>9}  check")
+    for r in ls:
+        print(f"{r['case']:<6}{r['n']:>10}{r['mb']:>9.2f}{r['seconds']:>9.3f}"
+              f"{r['samples_per_s']:>12.0f}{r['mb_per_s']:>9.2f}"
+              f"{r['peak_mb']:>9.1f}  {r['check']}")
+
+
+
+def main():
+    ap = argparse.ArgumentParser(description='benchmark LID conversions')
+    ap.add_argument('--cases', nargs='+', default=BENCH_CASES,
+                    help='logger type plus file version, i.e. TDO2 CTD3')
+    ap.add_argument('--sizes', nargs='+', type=int, default=BENCH_SIZES,
+                    help='number of samples per file')
+    ap.add_argument('--engine', default='numpy',
+                    choices=('numpy', 'sample', 'parallel'))
+    ap.add_argument('--fmt', default='csv', choices=('csv', 'npy'))
+    ap.add_argument('--reference', default='sample',
+                    help="engine to compare output with, 'none' to skip")
+    ap.add_argument('--dir', default=None,
+                    help='keep synthetic files and outputs in this folder')
+    args = ap.parse_args()
+
+    ref = None if args.reference == 'none' else args.reference
+    if args.dir:
+        os.makedirs(args.dir, exist_ok=True)
+    ls = run_bench(args.cases, args.sizes, args.engine, args.fmt, ref, args.dir)
+    _print_results(ls)
+    return 1 if any(r['check'] == 'DIFFERENT' for r in ls) else 0
+
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
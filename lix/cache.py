@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import shutil
+from importlib.metadata import version, PackageNotFoundError
+
+
+
+# one small JSON entry per LID file, in a folder next to the LID files,
+# so parallel conversions never write the same cache file
+CACHE_DIR = '.lix_cache'
+CS = 256
+# 'stat' hashes size, mtime and macro-header, 'content' hashes all bytes
+CACHE_MODE = 'stat'
+
+
+
+def lix_version():
+    try:
+        return version('lix')
+    except PackageNotFoundError:
+        return 'dev'
+
+
+
+def file_key(p, mode=CACHE_MODE):
+    h = hashlib.sha256()
+    with open(p, 'rb') as f:
+        if mode == 'content':
+            for b in iter(lambda: f.read(1 << 20), b''):
+                h.update(b)
+        else:
+            s = os.stat(p)
+            h.update(f'{s.st_size},{s.st_mtime_ns},'.encode())
+            h.update(f.read(CS))
+    return h.hexdigest()
+
+
+
+def cache_key(p, options, mode=CACHE_MODE):
+    # options: dictionary of output options, CSV columns, time format...
+    d = {
+        'file': file_key(p, mode),
+        'lix': lix_version(),
+        'options': options,
+    }
+    return hashlib.sha256(json.dumps(d, sort_keys=True).encode()).hexdigest()
+
+
+
+def _entry_path(p):
+    d = os.path.join(os.path.dirname(os.path.abspath(p)), CACHE_DIR)
+    return os.path.join(d, os.path.basename(p) + '.json')
+
+
+
+def cache_lookup(p, options, mode=CACHE_MODE):
+    # returns cache entry when outputs of p are current, None otherwise
+    try:
+        with open(_entry_path(p), 'r') as f:
+            e = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if e.get('key') != cache_key(p, options, mode):
+        return None
+    if not all(os.path.exists(o) for o in e.get('outputs', [])):
+        return None
+    return e
+
+
+
+def cache_store(p, options, outputs, n_samples, mode=CACHE_MODE):
+    e = {
+        'key': cache_key(p, options, mode),
+        'lid': os.path.basename(p),
+        'outputs': outputs,
+        'n_samples': n_samples,
+    }
+    path = _entry_path(p)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # write then rename, so readers never see half an entry
+    with open(path + '.tmp', 'w') as f:
+        json.dump(e, f, indent=4)
+    os.replace(path + '.tmp', path)
+    return e
+
+
+
+def cache_forget(p):
+    try:
+        os.remove(_entry_path(p))
+    except FileNotFoundError:
+        pass
+
+
+
+def clear_cache(folder):
+    # forget all conversions of LID files in this folder
+    shutil.rmtree(os.path.join(folder, CACHE_DIR), ignore_errors=True)
@@ -0,0 +1,210 @@
+import argparse
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from lix.stream import LidStream
+from lix.utils import read_gps, time_to_epoch
+
+
+
+# one row per LID file, queried by logger type, firmware and time span
+CATALOG_DB = 'lix_catalog.db'
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS deployments (
+    path TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime_ns INTEGER,
+    logger_type TEXT,
+    gfv TEXT,
+    file_version INTEGER,
+    epoch INTEGER,
+    battery_mv INTEGER,
+    calibration TEXT,
+    context TEXT,
+    n_samples INTEGER,
+    n_skipped INTEGER,
+    time_start INTEGER,
+    time_end INTEGER,
+    lat REAL,
+    lon REAL,
+    error TEXT,
+    gps_mtime_ns INTEGER
+);
+CREATE INDEX IF NOT EXISTS i_type_gfv ON deployments (logger_type, gfv);
+CREATE INDEX IF NOT EXISTS i_time ON deployments (time_start, time_end);
+'''
+_COLUMNS = ('path', 'size', 'mtime_ns', 'logger_type', 'gfv',
+            'file_version', 'epoch', 'battery_mv', 'calibration', 'context',
+            'n_samples', 'n_skipped', 'time_start', 'time_end', 'lat', 'lon',
+            'error', 'gps_mtime_ns')
+
+
+
+def _gps_mtime_ns(p):
+    # p: LID file, mtime of its .gps file, None when there is none yet
+    try:
+        return os.stat(p.replace('.lid', '.gps')).st_mtime_ns
+    except OSError:
+        return None
+
+
+
+def catalog_record(p):
+    # p: LID file, returns its catalog row as a dictionary, never raises
+    # only masks are walked, samples are not converted
+    s = os.stat(p)
+    r = dict.fromkeys(_COLUMNS)
+    r.update(path=os.path.abspath(p), size=s.st_size, mtime_ns=s.st_mtime_ns,
+             gps_mtime_ns=_gps_mtime_ns(p), error='')
+    try:
+        with LidStream(p) as st:
+            h = st.header
+            n, n_skipped, ct0, ct1 = st.count()
+        r.update(
+            logger_type=h.logger_type,
+            gfv=h.firmware,
+            file_version=h.file_version,
+            epoch=h.epoch,
+            battery_mv=h.battery_mv,
+            calibration=json.dumps(dict(h.calibration, **h.cq)),
+            context=json.dumps(dict(h.context)),
+            n_samples=n,
+            n_skipped=n_skipped,
+            time_start=None if ct0 is None else h.epoch + ct0,
+            time_end=None if ct1 is None else h.epoch + ct1,
+        )
+    except (Exception, ) as e:
+        r['error'] = f'{type(e).__name__}: {e}'
+    r['lat'], r['lon'] = read_gps(p.replace('.lid', '.gps'))
+    return r
+
+
+
+def open_catalog(db=CATALOG_DB):
+    c = sqlite3.connect(db)
+    c.executescript(_SCHEMA)
+    # catalogs made before .gps files were tracked, their rows get read again
+    have = [r[1] for r in c.execute('PRAGMA table_info(deployments)')]
+    if 'gps_mtime_ns' not in have:
+        with c:
+            c.execute('ALTER TABLE deployments ADD COLUMN gps_mtime_ns INTEGER')
+    return c
+
+
+
+def _walk_lid_files(folder):
+    for root, _, files in os.walk(folder):
+        for fn in files:
+            if fn.endswith('.lid'):
+                yield os.path.abspath(os.path.join(root, fn))
+
+
+
+def update_catalog(db, folders, n_workers=None):
+    # scans folders recursively, only new or changed LID files are read,
+    # a .gps file arriving or changing later counts as a change, and rows
+    # of LID files no longer there are removed
+    t0 = time.perf_counter()
+    c = open_catalog(db)
+    known = {r[0]: (r[1], r[2], r[3]) for r in
+             c.execute('SELECT path, size, mtime_ns, gps_mtime_ns FROM deployments')}
+
+    ls = []
+    seen = set()
+    for folder in folders:
+        for p in _walk_lid_files(folder):
+            seen.add(p)
+            s = os.stat(p)
+            if known.get(p) != (s.st_size, s.st_mtime_ns, _gps_mtime_ns(p)):
+                ls.append(p)
+
+    # forget files which were under these folders but are gone
+    roots = [os.path.join(os.path.abspath(f), '') for f in folders]
+    gone = [p for p in known if p not in seen
+            and any(p.startswith(r) for r in roots)]
+
+    rows = []
+    if ls:
+        with ProcessPoolExecutor(max_workers=n_workers) as ex:
+            rows = list(ex.map(catalog_record, ls, chunksize=16))
+
+    q = (f"INSERT OR REPLACE INTO deployments ({','.join(_COLUMNS)}) "
+         f"VALUES ({','.join('?' * len(_COLUMNS))})")
+    with c:
+        c.executemany(q, [[r[k] for k in _COLUMNS] for r in rows])
+        c.executemany('DELETE FROM deployments WHERE path = ?',
+                      [(p, ) for p in gone])
+    c.close()
+    return {
+        'n_files': len(seen),
+        'n_new': len([p for p in ls if p not in known]),
+        'n_changed': len([p for p in ls if p in known]),
+        'n_removed': len(gone),
+        'n_errors': len([r for r in rows if r['error']]),
+        'seconds': time.perf_counter() - t0,
+    }
+
+
+
+def query_catalog(db=CATALOG_DB, logger_type=None, gfv=None, start=None,
+                  end=None, file_version=None):
+    # returns paths of the LID files matching all the given conditions
+    # start, end: files with any sample in [start, end) are returned
+    w = ['error = ?']
+    a = ['']
+    if logger_type:
+        w.append('logger_type = ?')
+        a.append(logger_type)
+    if gfv:
+        w.append('gfv = ?')
+        a.append(gfv)
+    if file_version is not None:
+        w.append('file_version = ?')
+        a.append(file_version)
+    if start is not None:
+        w.append('time_end >= ?')
+        a.append(time_to_epoch(start))
+    if end is not None:
+        w.append('time_start < ?')
+        a.append(time_to_epoch(end))
+    c = open_catalog(db)
+    q = f"SELECT path FROM deployments WHERE {' AND '.join(w)} ORDER BY time_start"
+    rv = [r[0] for r in c.execute(q, a)]
+    c.close()
+    return rv
+
+
+
+def main():
+    ap = argparse.ArgumentParser(description='catalog of LID deployments')
+    ap.add_argument('--db', default=CATALOG_DB)
+    sp = ap.add_subparsers(dest='cmd', required=True)
+    a = sp.add_parser('scan', help='add new or changed LID files')
+    a.add_argument('folders', nargs='+')
+    a.add_argument('-j', '--workers', type=int, default=None)
+    a = sp.add_parser('query', help='list LID files matching all conditions')
+    a.add_argument('--type', dest='logger_type')
+    a.add_argument('--gfv')
+    a.add_argument('--file-version', type=int)
+    a.add_argument('--start', help='ISO 8601 date or time, UTC')
+    a.add_argument('--end', help='ISO 8601 date or time, UTC')
+    args = ap.parse_args()
+
+    if args.cmd == 'scan':
+        s = update_catalog(args.db, args.folders, args.workers)
+        print(f"{s['n_files']} files, {s['n_new']} new, {s['n_changed']} changed, "
+              f"{s['n_removed']} removed, {s['n_errors']} errors, "
+              f"{s['seconds']:.3f} s")
+        return 1 if s['n_errors'] else 0
+
+    for p in query_catalog(args.db, args.logger_type, args.gfv, args.start,
+                           args.end, args.file_version):
+        print(p)
+    return 0
+
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,122 @@
+import json
+import os
+import struct
+import numpy as np
+from lix.convert import BatchConverter
+from lix.derived import latitude
+from lix.header import get_calibration
+from lix.metrics import ConversionMetrics
+from lix.stream import LidStream, BATCH_SIZE
+
+
+
+# fixed .npy header length, so it can be rewritten once we know the rows
+NPY_HEADER_LEN = 128
+NPY_MANIFEST = 'manifest.json'
+
+
+
+def _npy_header(dtype, n):
+    # version 1.0 header, padded with spaces to NPY_HEADER_LEN
+    h = {
+        'descr': np.lib.format.dtype_to_descr(dtype),
+        'fortran_order': False,
+        'shape': (n, ),
+    }
+    s = repr(h).encode('latin1')
+    s += b' ' * (NPY_HEADER_LEN - 10 - len(s) - 1) + b'\n'
+    return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(s)) + s
+
+
+
+class _NpyColumn:
+    # one .npy file we append batches to
+    def __init__(self, path, dtype):
+        self.path = path
+        self.dtype = dtype
+        self.n = 0
+        self.f = open(path, 'wb')
+        self.f.write(_npy_header(dtype, 0))
+
+    def write(self, v):
+        v = np.ascontiguousarray(v, dtype=self.dtype)
+        self.f.write(v.data)
+        self.n += len(v)
+
+    def close(self):
+        self.f.seek(0)
+        self.f.write(_npy_header(self.dtype, self.n))
+        self.f.close()
+
+
+
+def write_npy(p, out_dir=None, batch_size=BATCH_SIZE, metrics=None,
+              derived=None, stats=None):
+    # p: LID file, writes one typed .npy file per column plus a manifest
+    # out_dir: defaults to a folder named as the LID file, ending in _npy
+    # metrics: ConversionMetrics to fill, see metrics.py
+    # derived: derived channels to add, one more .npy file each
+    # stats: DeploymentStats to update, see stats.py
+    # read with np.load(path, mmap_mode='r')
+    mt = metrics or ConversionMetrics()
+    if not out_dir:
+        out_dir = p.replace('.lid', '_npy')
+    os.makedirs(out_dir, exist_ok=True)
+
+    cols = {}
+    with LidStream(p) as st:
+        cal = get_calibration(st.header)
+        bc = BatchConverter(st.glt, st.epoch, cal, derived, latitude(p))
+        for d in mt.timed('demux', st.batches(batch_size)):
+            with mt.stage('calibration'):
+                d = bc.convert(d)
+            if stats:
+                with mt.stage('stats'):
+                    stats.add(d)
+            with mt.stage('write'):
+                for k, v in d.items():
+                    if k not in cols:
+                        # native byte order, loggers are big endian
+                        dt = v.dtype.newbyteorder('=')
+                        cols[k] = _NpyColumn(os.path.join(out_dir, f'{k}.npy'), dt)
+                    cols[k].write(v)
+        with mt.stage('write'):
+            for c in cols.values():
+                c.close()
+        mt.n_samples = st.n_samples
+        mt.n_skipped = st.n_skipped
+        mt.n_skipped_cv = bc.n_skipped_cv
+        mt.n_straddling = st.n_straddling
+        mt.n_bytes = st.raw_file_size
+
+        manifest = {
+            'source': os.path.basename(p),
+            'logger_type': st.glt,
+            'file_version': st.file_version,
+            'epoch': st.epoch,
+            'calibration': cal,
+            'n_samples': st.n_samples,
+            'n_skipped': st.n_skipped,
+            'n_skipped_cv': bc.n_skipped_cv,
+            'n_rows': cols['time'].n if cols else 0,
+            'columns': {k: {'file': os.path.basename(c.path), 'dtype': c.dtype.str}
+                        for k, c in cols.items()},
+        }
+
+    with open(os.path.join(out_dir, NPY_MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=4)
+    return manifest
+
+
+
+def load_npy(out_dir, columns=None):
+    # returns dictionary of memory-mapped columns, only the ones asked for
+    with open(os.path.join(out_dir, NPY_MANIFEST), 'r') as f:
+        manifest = json.load(f)
+    if columns is None:
+        columns = list(manifest['columns'].keys())
+    rv = {}
+    for k in columns:
+        fn = manifest['columns'][k]['file']
+        rv[k] = np.load(os.path.join(out_dir, fn), mmap_mode='r')
+    return manifest, rv
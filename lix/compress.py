@@ -0,0 +1,107 @@
+import bz2
+import gzip
+import lzma
+import queue
+import threading
+
+
+
+# name: (file extension, opener of a binary file object)
+COMPRESSION = {
+    'gzip': ('.gz', lambda p: gzip.open(p, 'wb', compresslevel=6)),
+    'bz2': ('.bz2', lambda p: bz2.open(p, 'wb')),
+    'lzma': ('.xz', lambda p: lzma.open(p, 'wb')),
+}
+# text is queued in blocks of about this many characters, at most these
+# many blocks wait for the compression thread before write() blocks
+COMPRESS_BLOCK = 1 << 20
+COMPRESS_QUEUE_SIZE = 8
+
+
+
+class ExceptionLixCompress(Exception):
+    pass
+
+
+
+def compressed_path(p, compression):
+    # p: output path, returns the one actually written
+    if not compression:
+        return p
+    if compression not in COMPRESSION:
+        e = f'lix: unknown compression {compression}, use one of {list(COMPRESSION)}'
+        raise ExceptionLixCompress(e)
+    return p + COMPRESSION[compression][0]
+
+
+
+class CompressedWriter:
+    # text file object compressing in a background thread, so formatting
+    # next batch and compressing previous one happen at the same time,
+    # zlib, bz2 and lzma release the GIL while they work
+    def __init__(self, p, compression, queue_size=COMPRESS_QUEUE_SIZE):
+        self.path = compressed_path(p, compression)
+        self._f = COMPRESSION[compression][1](self.path)
+        self._q = queue.Queue(maxsize=queue_size)
+        self._buf = []
+        self._n = 0
+        self._error = None
+        self._t = threading.Thread(target=self._run, daemon=True)
+        self._t.start()
+
+    def _run(self):
+        while 1:
+            b = self._q.get()
+            if b is None:
+                break
+            if self._error:
+                # keep draining so write() never blocks on a dead thread
+                continue
+            try:
+                self._f.write(b)
+            except (Exception, ) as e:
+                self._error = e
+        try:
+            self._f.close()
+        except (Exception, ) as e:
+            self._error = self._error or e
+
+    def _check(self):
+        if self._error:
+            raise ExceptionLixCompress(f'lix: compressing {self.path} -> {self._error}')
+
+    def _put(self):
+        if self._buf:
+            self._q.put(''.join(self._buf).encode())
+            self._buf = []
+            self._n = 0
+
+    def write(self, s):
+        self._check()
+        self._buf.append(s)
+        self._n += len(s)
+        if self._n >= COMPRESS_BLOCK:
+            self._put()
+        return len(s)
+
+    def close(self):
+        if self._t.is_alive():
+            self._put()
+            self._q.put(None)
+            self._t.join()
+        self._check()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+
+def open_output(p, compression=None):
+    # returns text file object for p, compressed ones go to p + extension,
+    # see .path of it, data is never written uncompressed to disk
+    if not compression:
+        return open(p, 'w')
+    return CompressedWriter(p, compression)
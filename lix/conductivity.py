@@ -0,0 +1,48 @@
+import gsw
+import numpy as np
+
+
+# CSV files show ratio with 6 decimals, temperature and pressure with 3,
+# salinity has always been computed from these rounded values
+DECIMALS_RATIO_CV = 6
+DECIMALS_TP = 3
+
+
+
+def _round_as_text(x, decimals):
+    # same value as float('{:.nf}'.format(x)), np.round() differs only on
+    # ties, which ratios of small integers hit often, so only values next
+    # to a half boundary, x * 10^n error included, go through text
+    x = np.asarray(x, dtype=np.float64)
+    s = 10.0 ** decimals
+    y = x * s
+    rv = np.round(y) / s
+    near = np.abs(np.abs(y - np.floor(y)) - 0.5) <= 1e-9 * np.maximum(np.abs(y), 1)
+    if near.any():
+        rv[near] = np.char.mod(f'%.{decimals}f', x[near]).astype(np.float64)
+    return rv
+
+
+
+def ratio_cv_array(c2c1, c1c2, v1v2, v2v1):
+    # returns ratio of counts to voltages, NaN when v1v2 + v2v1 == 0
+    c = np.asarray(c2c1, dtype=np.float64) + np.asarray(c1c2)
+    v = np.asarray(v1v2, dtype=np.int64) + np.asarray(v2v1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = np.where(v == 0, np.nan, c / np.where(v == 0, 1, v))
+    return _round_as_text(r, DECIMALS_RATIO_CV)
+
+
+
+def conductivity_array(ratio_cv, cqa, cqb, cqc):
+    # teos_10 wants mS/cm, not S/m
+    conductivity_s_m = (cqa * ratio_cv * ratio_cv) + (cqb * ratio_cv) + cqc
+    return conductivity_s_m * 10
+
+
+
+def salinity_array(conductivity_ms_cm, vt, cpd):
+    # one gsw call for whole columns, vt in Celsius, cpd in dbar
+    vt = _round_as_text(vt, DECIMALS_TP)
+    cpd = _round_as_text(cpd, DECIMALS_TP)
+    return gsw.conversions.SP_from_C(conductivity_ms_cm, vt, cpd)
@@ -0,0 +1,73 @@
+import numpy as np
+from lix.conductivity import ratio_cv_array, conductivity_array, salinity_array
+from lix.derived import apply_derived, check_derived, context
+from lix.oxygen import do16_to_float_array, wat_to_percent
+from lix.pressure import LixFileConverterP, prf_compensate_pressure_array
+from lix.temperature import LixFileConverterT
+
+
+
+class ExceptionLixFileConversion(Exception):
+    pass
+
+
+
+class BatchConverter:
+    # converts batches of raw columns from LidStream to physical units
+    def __init__(self, glt, epoch, cal, derived=None, lat=None):
+        # cal: calibration dictionary, as returned by get_calibration()
+        # derived: names of derived channels to add, see derived.py
+        # lat: latitude for them, None means DERIVED_LATITUDE
+        self.glt = glt
+        self.epoch = epoch
+        self.cal = cal
+        self.derived = check_derived(glt, derived or [])
+        self.ctx = context(glt, cal, lat)
+        # CTD samples with v1v2 + v2v1 == 0, they are dropped
+        self.n_skipped_cv = 0
+        if glt in ('TDO', 'CTD'):
+            if not cal:
+                e = f'lix: {glt} file has no calibration, see header has_cc_area'
+                raise ExceptionLixFileConversion(e)
+            self.lct = LixFileConverterT(cal['tma'], cal['tmb'], cal['tmc'],
+                                         cal['tmd'], cal['tmr'])
+            self.lcp = LixFileConverterP(cal['pra'], cal['prb'])
+
+    def convert(self, d):
+        # d: batch of columns, converted and derived ones are added to it
+        d = self._convert(d)
+        if self.derived:
+            d = apply_derived(d, self.derived, self.ctx)
+        return d
+
+    def _convert(self, d):
+        # time: seconds since 1970, UTC
+        d['time'] = self.epoch + d['ct']
+        if self.glt.startswith('DO'):
+            d['dos'] = do16_to_float_array(d['dos'])
+            d['dop'] = do16_to_float_array(d['dop'])
+            d['dot'] = do16_to_float_array(d['dot'])
+            if self.glt == 'DO2':
+                d['wat'] = wat_to_percent(d['wat'])
+            return d
+
+        # vt: Celsius, rpd: dbar, cp: compensated ADC, cpd: compensated dbar
+        d['vt'] = self.lct.convert(d['rt'])
+        d['rpd'] = self.lcp.convert_array(d['rp'])
+        d['cp'] = prf_compensate_pressure_array(d['rp'], d['rt'],
+                                                self.cal['prc'], self.cal['prd'])
+        d['cpd'] = self.lcp.convert_array(d['cp'])
+        if self.glt == 'TDO':
+            return d
+
+        # CTD samples without voltage cannot be converted, skip them
+        r = ratio_cv_array(d['c2c1'], d['c1c2'], d['v1v2'], d['v2v1'])
+        ok = ~np.isnan(r)
+        self.n_skipped_cv += int((~ok).sum())
+        if not ok.all():
+            d = {k: v[ok] for k, v in d.items()}
+            r = r[ok]
+        d['ratio_cv'] = r
+        d['con'] = conductivity_array(r, self.cal['cqa'], self.cal['cqb'], self.cal['cqc'])
+        d['sal'] = salinity_array(d['con'], d['vt'], d['cpd'])
+        return d
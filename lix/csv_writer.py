@@ -0,0 +1,148 @@
+from lix.utils import time_to_iso8601_array
+
+
+
+# column name: CSV title, printf format, None means per logger type below
+CSV_COLUMNS = {
+    'time': ('ISO 8601 Time', '%s'),
+    'et': ('elapsed time (s)', '%d'),
+    'ct': ('agg. time(s)', '%d'),
+    'rt': ('raw ADC Temp', '%d'),
+    'rp': ('raw ADC Pressure', '%d'),
+    'vt': ('Temperature (C)', '%06.3f'),
+    'rpd': ('Pressure (dbar)', '%06.3f'),
+    'cp': ('Compensated ADC Pressure', None),
+    'cpd': ('Compensated Pressure (dbar)', '%06.3f'),
+    'ax': ('Ax', '%d'),
+    'ay': ('Ay', '%d'),
+    'az': ('Az', '%d'),
+    'c2c1': ('c2c1', '%d'),
+    'c1c2': ('c1c2', '%d'),
+    'v1v2': ('v1v2', '%d'),
+    'v2v1': ('v2v1', '%d'),
+    'ratio_cv': ('ratio_cv', '%.6f'),
+    'con': ('Conductivity (mS/cm)', '%.3f'),
+    'sal': ('Salinity (TEOS-10)', '%.3f'),
+    'dos': ('Dissolved Oxygen (mg/l)', '%.2f'),
+    'dop': ('Dissolved Oxygen (%)', '%.2f'),
+    'dot': ('DO Temperature (C)', '%.2f'),
+    'wat': ('Water Detect (%)', '%.2f'),
+}
+CSV_TITLE_EPOCH = 'Epoch Time (s)'
+
+
+# compensated ADC pressure has always been integer on TDO, float on CTD
+CSV_FORMAT_CP = {
+    'TDO': '%d',
+    'CTD': '%r',
+}
+
+
+_CTD_WORDS = ['c2c1', 'c1c2', 'v1v2', 'v2v1', 'ratio_cv', 'con', 'sal']
+CSV_COLUMN_SETS = {
+    ('TDO', 'compact'): ['time', 'vt', 'cpd', 'ax', 'ay', 'az'],
+    ('TDO', 'extended'): ['time', 'et', 'ct', 'rt', 'rp', 'vt', 'rpd', 'cp',
+                          'cpd', 'ax', 'ay', 'az'],
+    ('CTD', 'compact'): ['time', 'vt', 'cpd', 'ax', 'ay', 'az'] + _CTD_WORDS,
+    ('CTD', 'extended'): ['time', 'et', 'ct', 'rt', 'rp', 'vt', 'rpd', 'cp',
+                          'cpd', 'ax', 'ay', 'az'] + _CTD_WORDS,
+    ('DO1', 'compact'): ['time', 'dos', 'dop', 'dot'],
+    ('DO2', 'compact'): ['time', 'dos', 'dop', 'dot', 'wat'],
+}
+CSV_COLUMN_SETS[('DO1', 'extended')] = CSV_COLUMN_SETS[('DO1', 'compact')]
+CSV_COLUMN_SETS[('DO2', 'extended')] = CSV_COLUMN_SETS[('DO2', 'compact')]
+
+
+# on compact sets there is only one pressure, the compensated one
+_CSV_TITLES_COMPACT = {
+    'cpd': 'Pressure (dbar)',
+}
+
+
+
+class ExceptionLixCsvColumns(Exception):
+    pass
+
+
+
+def check_columns(glt, columns, derived=None):
+    # raises when columns cannot be written for logger type glt, so
+    # callers know it before creating any file
+    if isinstance(columns, str):
+        if (glt, columns) not in CSV_COLUMN_SETS:
+            e = f'lix: no CSV column set {columns} for logger type {glt}'
+            raise ExceptionLixCsvColumns(e)
+        return
+    bad = [k for k in columns if k not in CSV_COLUMNS]
+    if bad:
+        raise ExceptionLixCsvColumns(f'lix: unknown CSV columns {bad}')
+    have = CSV_COLUMN_SETS.get((glt, 'extended'), []) + list(derived or [])
+    bad = [k for k in columns if k not in have]
+    if bad:
+        e = f'lix: CSV columns {bad} not in {glt} files, derived ones must be enabled'
+        raise ExceptionLixCsvColumns(e)
+
+
+
+class CsvWriter:
+    # formats whole batches of converted columns into one buffer per batch
+    def __init__(self, fo, glt, columns='extended', precision=None,
+                 time_fmt='iso', derived=None):
+        # fo: text file opened for writing
+        # columns: 'compact', 'extended' or a list of column names
+        # precision: None keeps usual formats, n writes all floats as %.nf
+        # time_fmt: 'iso' for ISO 8601 strings, 'epoch' for seconds
+        # derived: derived channels, see derived.py, go after columns
+        check_columns(glt, columns, derived)
+        self.fo = fo
+        self.glt = glt
+        self.time_fmt = time_fmt
+        if isinstance(columns, str):
+            self.names = CSV_COLUMN_SETS[(glt, columns)]
+            self.titles = [_CSV_TITLES_COMPACT.get(k, CSV_COLUMNS[k][0])
+                           if columns == 'compact' else CSV_COLUMNS[k][0]
+                           for k in self.names]
+        else:
+            self.names = list(columns)
+            self.titles = [CSV_COLUMNS[k][0] for k in self.names]
+        for k in derived or []:
+            if k not in self.names:
+                self.names = self.names + [k]
+                self.titles = self.titles + [CSV_COLUMNS[k][0]]
+        if time_fmt == 'epoch':
+            self.titles = [CSV_TITLE_EPOCH if k == 'time' else t
+                           for k, t in zip(self.names, self.titles)]
+
+        # one printf template for the whole row, %d truncates as int() did
+        fmt = []
+        for k in self.names:
+            f = CSV_COLUMNS[k][1]
+            if k == 'cp':
+                f = CSV_FORMAT_CP.get(glt, '%r')
+            if k == 'time':
+                f = '%d' if time_fmt == 'epoch' else '%s'
+            elif precision is not None and (f.endswith('f') or k == 'cp'):
+                f = f'%.{precision}f'
+            fmt.append(f)
+        self.template = ','.join(fmt) + '\n'
+
+    def header(self):
+        return ','.join(self.titles) + '\n'
+
+    def write_header(self):
+        self.fo.write(self.header())
+
+    def _column(self, d, k):
+        if k == 'time' and self.time_fmt != 'epoch':
+            return time_to_iso8601_array(d[k]).tolist()
+        return d[k].tolist()
+
+    def format(self, d):
+        # d: batch of columns, returns its CSV text
+        cols = [self._column(d, k) for k in self.names]
+        tpl = self.template
+        return ''.join([tpl % r for r in zip(*cols)])
+
+    def write(self, d):
+        # one system call per batch
+        self.fo.write(self.format(d))
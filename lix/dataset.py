@@ -0,0 +1,38 @@
+import numpy as np
+from lix.convert import BatchConverter
+from lix.header import get_calibration
+from lix.stream import LidStream, BATCH_SIZE
+
+
+
+def _native(v):
+    # loggers are big endian, users want native arrays
+    return v.astype(v.dtype.newbyteorder('='), copy=False)
+
+
+
+def read_lid(src, structured=False, batch_size=BATCH_SIZE, derived=None,
+             lat=None):
+    # src: path, bytes-like object or binary file object, i.e. an upload
+    # returns (LidHeader, columns), nothing is written anywhere
+    # columns: dictionary of arrays, time and raw words plus converted
+    # values, same names as CSV ones, or one structured array when asked
+    # derived: derived channels to add, lat: for them, see derived.py
+    with LidStream(src) as st:
+        h = st.header
+        bc = BatchConverter(st.glt, st.epoch, get_calibration(h), derived, lat)
+        ls = [bc.convert(d) for d in st.batches(batch_size)]
+
+    d = {}
+    if ls:
+        # time first, as in CSV files
+        keys = ['time'] + [k for k in ls[0] if k != 'time']
+        d = {k: _native(np.concatenate([b[k] for b in ls])) for k in keys}
+    if not structured:
+        return h, d
+
+    n = len(d['time']) if d else 0
+    a = np.empty(n, dtype=[(k, v.dtype) for k, v in d.items()])
+    for k, v in d.items():
+        a[k] = v
+    return h, a
@@ -0,0 +1,115 @@
+import gsw
+import numpy as np
+from typing import Callable, NamedTuple
+from lix.utils import read_gps
+from lix.csv_writer import CSV_COLUMNS, CSV_COLUMN_SETS
+
+
+
+# latitude for depth when there is no .gps file, gravity changes less
+# than 0.3 % from there to the equator or the poles
+DERIVED_LATITUDE = 45.0
+
+
+
+class ExceptionLixDerived(Exception):
+    pass
+
+
+
+class DerivedChannel(NamedTuple):
+    name: str
+    # columns of the converted batch, or other derived channels, it uses
+    needs: tuple
+    # fn(d, ctx) returns one array as long as batch d, ctx: see context()
+    fn: Callable
+    title: str
+    fmt: str
+
+
+
+# name: DerivedChannel, filled by register_derived()
+DERIVED_CHANNELS = {}
+
+
+
+def register_derived(name, needs, title, fmt='%.3f'):
+    # decorator adding a derived channel, it also becomes a CSV column
+    # @register_derived('speed', ['ax', 'ay'], 'Speed (m/s)')
+    # def _speed(d, ctx):
+    #     return ...
+    def _register(fn):
+        if name in CSV_COLUMNS and name not in DERIVED_CHANNELS:
+            raise ExceptionLixDerived(f'lix: {name} is already a column')
+        DERIVED_CHANNELS[name] = DerivedChannel(name, tuple(needs), fn,
+                                                title, fmt)
+        CSV_COLUMNS[name] = (title, fmt)
+        return fn
+    return _register
+
+
+
+def check_derived(glt, names):
+    # returns names, raises when unknown or needing a missing column
+    have = set(CSV_COLUMN_SETS[(glt, 'extended')])
+    for k in names:
+        if k not in DERIVED_CHANNELS:
+            e = f'lix: unknown derived channel {k}, use one of {list(DERIVED_CHANNELS)}'
+            raise ExceptionLixDerived(e)
+        bad = [c for c in DERIVED_CHANNELS[k].needs if c not in have]
+        if bad:
+            e = f'lix: derived channel {k} needs {bad}, not in {glt} files or enabled before it'
+            raise ExceptionLixDerived(e)
+        have.add(k)
+    return list(names)
+
+
+
+def context(glt, cal, lat=None):
+    # what derived channels may know besides the batch itself
+    return {
+        'glt': glt,
+        'cal': cal,
+        'lat': DERIVED_LATITUDE if lat is None else lat,
+    }
+
+
+
+def latitude(p):
+    # p: LID file, latitude of its .gps file, None when there is none
+    return read_gps(p.replace('.lid', '.gps'))[0]
+
+
+
+def apply_derived(d, names, ctx):
+    # d: converted batch, derived columns are added to it in names order
+    for k in names:
+        d[k] = DERIVED_CHANNELS[k].fn(d, ctx)
+    return d
+
+
+
+@register_derived('depth', ['cpd'], 'Depth (m)')
+def _depth(d, ctx):
+    # TEOS-10 height is negative below the sea surface
+    return -gsw.z_from_p(d['cpd'], ctx['lat'])
+
+
+
+@register_derived('tilt', ['ax', 'ay', 'az'], 'Tilt (deg)', '%.2f')
+def _tilt(d, ctx):
+    # angle between accelerometer z axis and gravity, 0 when upright
+    ax = d['ax'].astype(np.float64)
+    ay = d['ay'].astype(np.float64)
+    az = d['az'].astype(np.float64)
+    return np.degrees(np.arctan2(np.hypot(ax, ay), az))
+
+
+
+@register_derived('acc', ['ax', 'ay', 'az'], 'Acceleration magnitude', '%.1f')
+def _acc(d, ctx):
+    # same units as Ax, Ay, Az, about constant when logger is not moving
+    ax = d['ax'].astype(np.float64)
+    ay = d['ay'].astype(np.float64)
+    az = d['az'].astype(np.float64)
+    return np.sqrt(ax * ax + ay * ay + az * az)
@@ -0,0 +1,301 @@
+import numpy as np
+
+
+# chunk size, mini-header length, payload bytes per chunk
+CS = 256
+LEN_MINI_HEADER = 8
+LEN_PAYLOAD = CS - LEN_MINI_HEADER
+MASK_TIME_EXTENDED = 0x40
+# min. and max. number of samples tested per step when scanning masks
+SCAN_STEP_MIN = 64
+SCAN_STEP = 65536
+# runs of same mask length shorter than this are walked one sample at a
+# time, these many samples, vector steps cost more than they save there
+SCAN_RUN_SHORT = 16
+SCAN_SCALAR = 1024
+
+
+# raw sample layouts, loggers write big endian
+DT_TDO = np.dtype([
+    ('rt', '>u2'),
+    ('rp', '>u2'),
+    ('ax', '>i2'),
+    ('ay', '>i2'),
+    ('az', '>i2'),
+])
+DT_CTD = np.dtype(DT_TDO.descr + [
+    ('c2c1', '>u2'),
+    ('c1c2', '>u2'),
+    ('v1v2', '>u2'),
+    ('v2v1', '>u2'),
+])
+DT_DO1 = np.dtype([
+    ('dos', '>u2'),
+    ('dop', '>u2'),
+    ('dot', '>u2'),
+])
+DT_DO2 = np.dtype(DT_DO1.descr + [
+    ('wat', '>u2'),
+])
+
+
+
+def payload_to_raw(p):
+    # p: position in the stream of chunk payloads, mini-headers removed
+    # returns: position in the data section, mini-headers included
+    return (p // LEN_PAYLOAD) * CS + LEN_MINI_HEADER + p % LEN_PAYLOAD
+
+
+
+def _data_as_array(bb, data_size):
+    # bb: data section of a LID file, padding may follow it
+    # we read up to the end of the last chunk so gathers never go out of range
+    n = -(-data_size // CS) * CS
+    a = np.frombuffer(bb, dtype=np.uint8, count=min(n, len(bb)))
+    if len(a) < n:
+        a = np.concatenate((a, np.zeros(n - len(a), dtype=np.uint8)))
+    return a
+
+
+
+def _first(x):
+    # index of first True in x, or len(x) when none
+    return int(np.argmax(x)) if x.any() else len(x)
+
+
+
+def _scan_scalar(a, data_size, sl, p, nm, n):
+    # same walk as scan_masks() one sample at a time, for short runs
+    # returns positions, times, skips, samples, where to resume, if
+    # finished and length of the last run of same mask length
+    mv = a.data
+    n_a = len(a)
+    ls_p = []
+    ls_t = []
+    ls_skip = []
+    lm_last = 0
+    run = 0
+    done = False
+    for _ in range(n):
+        r = p % LEN_PAYLOAD
+        qi = (p // LEN_PAYLOAD) * CS + LEN_MINI_HEADER + r
+        if qi >= n_a:
+            done = True
+            break
+        # end is tested before jumping the mini-header
+        if (qi - LEN_MINI_HEADER if r == 0 else qi) + sl + 1 >= data_size:
+            done = True
+            break
+        b0 = mv[qi]
+        if b0 & MASK_TIME_EXTENDED:
+            lm = 2
+            t = ((b0 & 0x3F) << 8) + mv[qi + 1]
+        else:
+            lm = 1
+            t = b0 & 0x3F
+        zero = t == 0 and nm > 0
+        if zero and qi > data_size - CS:
+            done = True
+            break
+        ls_p.append(p + lm)
+        ls_t.append(t)
+        ls_skip.append(zero)
+        run = run + 1 if lm == lm_last else 1
+        lm_last = lm
+        nm += 1
+        p += lm + sl
+    return ls_p, ls_t, ls_skip, nm, p, done, run
+
+
+
+def scan_masks(bb, data_size, sl, p=0, nm=0, n_max=None):
+    # bb: data section of a TDO / CTD file
+    # data_size: same value as per-sample parser, data section minus padding
+    # sl: sample length without mask
+    # p: payload position of the first mask to scan
+    # nm: number of samples before p, t == 0 is only a skip when nm > 0
+    # n_max: stop after these many samples, None means all of them
+    #
+    # returns sample payload positions, right after its mask, elapsed times,
+    # skip flags, the number of samples, where to resume and if finished,
+    # all the way the per-sample parser walks them, only that runs of
+    # samples with same mask length are tested together, not one by one,
+    # unless runs are short, i.e. mixed periods around 64 s, see SCAN_RUN_SHORT
+    a = _data_as_array(bb, data_size)
+    ls_p = []
+    ls_t = []
+    ls_skip = []
+    n_step = SCAN_STEP_MIN
+    n_got = 0
+    done = False
+    short = False
+
+    while n_max is None or n_got < n_max:
+        n = n_step if n_max is None else min(n_step, n_max - n_got)
+        if short:
+            n = SCAN_SCALAR if n_max is None else min(SCAN_SCALAR, n_max - n_got)
+            s_p, s_t, s_skip, nm, p, done, run = _scan_scalar(
+                a, data_size, sl, p, nm, n)
+            ls_p.append(np.array(s_p, dtype=np.int64))
+            ls_t.append(np.array(s_t, dtype=np.int64))
+            ls_skip.append(np.array(s_skip, dtype=bool))
+            n_got += len(s_p)
+            if done:
+                break
+            short = run < SCAN_RUN_SHORT
+            n_step = SCAN_STEP_MIN
+            continue
+
+        if payload_to_raw(p) >= len(a):
+            done = True
+            break
+
+        # assume next samples have same mask length as the current one
+        lm = 2 if a[payload_to_raw(p)] & MASK_TIME_EXTENDED else 1
+        k = np.arange(n, dtype=np.int64)
+        q = p + (lm + sl) * k
+        qi = payload_to_raw(q)
+
+        # per-sample parser tests the end before jumping the mini-header
+        qi_pre = np.where(q % LEN_PAYLOAD == 0, qi - LEN_MINI_HEADER, qi)
+        n_end = _first(qi_pre + sl + 1 >= data_size)
+        q = q[:n_end]
+        qi = qi[:n_end]
+
+        # a run of samples ends when mask length changes
+        b0 = a[qi].astype(np.uint16)
+        n_run = _first(((b0 & MASK_TIME_EXTENDED) != 0) != (lm == 2))
+        q = q[:n_run]
+        qi = qi[:n_run]
+        b0 = b0[:n_run]
+        if lm == 1:
+            t = b0 & 0x3F
+        else:
+            # the per-sample parser reads 2nd byte of mask as raw, not payload
+            t = ((b0 & 0x3F) << 8) + a[qi + 1]
+
+        # t == 0 on last chunk means early end, otherwise a skipped sample
+        zero = (t == 0) & (nm + k[:n_run] > 0)
+        n_ok = _first(zero & (qi > data_size - CS))
+
+        ls_p.append(q[:n_ok] + lm)
+        ls_t.append(t[:n_ok])
+        ls_skip.append(zero[:n_ok])
+        nm += n_ok
+        n_got += n_ok
+        if n_ok < n_run or n_run == n_end < n:
+            done = True
+            break
+        p += (lm + sl) * n_run
+
+        # long runs are the usual case, grow step while they last
+        if n_run == n:
+            n_step = min(n_step * 2, SCAN_STEP)
+        else:
+            n_step = SCAN_STEP_MIN
+            short = n_run < SCAN_RUN_SHORT
+
+    if not ls_p:
+        e = np.zeros(0, dtype=np.int64)
+        return e, e.astype(np.uint16), e.astype(bool), nm, p, done
+    return (np.concatenate(ls_p),
+            np.concatenate(ls_t).astype(np.uint16),
+            np.concatenate(ls_skip),
+            nm, p, done)
+
+
+
+def _truncate_at_end(s, valid):
+    # s: sample bytes, one row per sample, valid: the ones before data end
+    # per-sample parser slices data section, so last sample may be short,
+    # a 16-bit word with only its first byte is that byte, none is zero
+    r = ~valid.all(axis=1)
+    if not r.any():
+        return s
+    w = s[r].reshape(-1, 2)
+    v = valid[r].reshape(-1, 2)
+    w[:, 1] = np.where(v[:, 1], w[:, 1], np.where(v[:, 0], w[:, 0], 0))
+    w[:, 0] = np.where(v[:, 1], w[:, 0], 0)
+    s[r] = w.reshape(-1, s.shape[1])
+    return s
+
+
+
+def count_straddling(starts, ends):
+    # starts, ends: payload positions of first and after last byte of
+    # samples, masks included, returns how many go across chunks
+    return int((starts // LEN_PAYLOAD != (ends - 1) // LEN_PAYLOAD).sum())
+
+
+
+def gather_samples(bb, data_size, p, sl):
+    # p: payload positions of the samples, as returned by scan_masks()
+    # gathers all sample bytes, straddling chunks or not, in one go
+    a = _data_as_array(bb, data_size)
+    idx = payload_to_raw(p[:, None] + np.arange(sl, dtype=np.int64))
+    return _truncate_at_end(a[idx], idx < data_size)
+
+
+
+def decode_samples(bb, data_size, glt, p):
+    # returns structured array with raw T, P, Ax, Ay, Az and CTD words
+    dt = DT_CTD if glt == 'CTD' else DT_TDO
+    s = gather_samples(bb, data_size, p, dt.itemsize)
+    return s.view(dt).reshape(-1)
+
+
+
+def dox_chunks_per_batch(glt):
+    # DOX batches must hold whole samples, DO1 ones straddle chunks
+    sl = DT_DO2.itemsize if glt == 'DO2' else DT_DO1.itemsize
+    return int(np.lcm(LEN_PAYLOAD, sl)) // LEN_PAYLOAD
+
+
+
+def count_dox(data_size, glt):
+    # number of DOX samples, end of data tested as the per-sample parser does
+    sl = DT_DO2.itemsize if glt == 'DO2' else DT_DO1.itemsize
+    min_mask_len = 0 if glt == 'DO2' else 1
+
+    def _is_end(k):
+        q = k * sl
+        i = payload_to_raw(q)
+        if q % LEN_PAYLOAD == 0:
+            i -= LEN_MINI_HEADER
+        return i + sl + min_mask_len >= data_size
+
+    # end test grows with k, so bisect it
+    lo, hi = 0, data_size // sl + 1
+    while lo < hi:
+        k = (lo + hi) // 2
+        if _is_end(k):
+            hi = k
+        else:
+            lo = k + 1
+    return lo
+
+
+
+def decode_dox(bb, data_size, glt, c0=0, c1=None):
+    # DOX samples have no mask and go back to back on the payload stream
+    # c0, c1: range of chunks to decode, c0 multiple of dox_chunks_per_batch()
+    dt = DT_DO2 if glt == 'DO2' else DT_DO1
+    sl = dt.itemsize
+    n = count_dox(data_size, glt)
+
+    # drop the mini-headers of all chunks in one go
+    a = _data_as_array(bb, data_size)
+    n_chunks = len(a) // CS
+    c1 = n_chunks if c1 is None else min(c1, n_chunks)
+    pl = a[c0 * CS:c1 * CS].reshape(-1, CS)[:, LEN_MINI_HEADER:].flatten()
+
+    # first sample in this range and how many of them are real
+    k0 = c0 * LEN_PAYLOAD // sl
+    m = max(0, min(len(pl) // sl, n - k0))
+    s = pl[:m * sl].reshape(m, sl)
+
+    # only the very last sample may go past data end, into the padding
+    if m:
+        q = (k0 + m - 1) * sl + np.arange(sl, dtype=np.int64)
+        s[-1:] = _truncate_at_end(s[-1:], payload_to_raw(q)[None, :] < data_size)
+    return s.reshape(-1).view(dt)
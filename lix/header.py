@@ -0,0 +1,175 @@
+from types import MappingProxyType
+from typing import NamedTuple
+from lix.ascii85 import ascii85_to_num as a2n
+from lix.utils import (
+    scale_battery,
+    _time_mah_str_to_seconds,
+    _time_bytes_to_str,
+)
+
+
+# macro-header areas, must match firmware hsa.h
+CS = 256
+I_CC_AREA = 13
+LEN_LIX_FILE_CC_AREA = 5 * 33
+LEN_LIX_FILE_CQ_AREA = 5 * 3
+LEN_LIX_FILE_CONTEXT = 64
+LEN_LIX_FILE_CONTEXT_V3 = 48
+CC_AREA_TAG = b'00004'
+
+
+# name: position in CC area, all ascii85 but PRC / PRD
+CC_FIELDS = {
+    'tmr': 10,
+    'tma': 15,
+    'tmb': 20,
+    'tmc': 25,
+    'tmd': 30,
+    'pra': 125,
+    'prb': 130,
+    'prc': 135,
+    'prd': 140,
+    'dco': 145,
+    'nco': 150,
+    'dhu': 155,
+    'dcd': 160,
+}
+
+
+# the ones get_calibration() has always returned
+_CONVERSION_FIELDS = ('tmr', 'tma', 'tmb', 'tmc', 'tmd',
+                      'pra', 'prb', 'prc', 'prd')
+
+
+
+class LidHeader(NamedTuple):
+    # decoded macro-header, immutable, mappings are read-only
+    # logger_type: 'TDO', 'CTD', 'DO1', 'DO2'
+    # timestamp: '240131123456', epoch: same one as seconds since 1970
+    # battery: raw mV from voltage divider, battery_mv: real ones
+    # calibration: CC area, empty for DOX loggers or when not detected
+    # context: firmware and profiling settings, gfv, rvn, pfm, spn, spt...
+    # cq: CTD conductivity constants, zeros when the file has none
+    # spt: DOX sampling period in seconds, 0 for other loggers
+    logger_type: str
+    file_version: int
+    timestamp: str
+    epoch: int
+    battery: int
+    battery_mv: int
+    header_index: int
+    has_cc_area: bool
+    calibration: MappingProxyType
+    context: MappingProxyType
+    cq: MappingProxyType
+    spt: int
+
+    @property
+    def firmware(self):
+        return self.context['gfv']
+
+    def to_dict(self):
+        # plain, JSON-friendly, copy
+        d = self._asdict()
+        for k in ('calibration', 'context', 'cq'):
+            d[k] = dict(d[k])
+        return d
+
+
+
+def _parse_context(bb, file_version):
+    # context area sits at the end of the macro-header
+    if file_version == 2:
+        i = CS - LEN_LIX_FILE_CONTEXT
+    else:
+        i = CS - LEN_LIX_FILE_CONTEXT_V3
+    ctx = {'gfv': bb[i:i + 4].decode()}
+    i += 4
+    for k in ('rvn', 'pfm', 'spn'):
+        ctx[k] = bb[i]
+        i += 1
+    # DRF does not take 5 characters but 2
+    for k, n in (('spt', 5), ('dro', 5), ('dru', 5), ('drf', 2),
+                 ('dso', 5), ('dsu', 5)):
+        ctx[k] = bb[i:i + n].decode()
+        i += n
+    return ctx
+
+
+
+def _parse_cc_area(cc_area):
+    cal = {}
+    for k, i in CC_FIELDS.items():
+        s = cc_area[i:i + 5].decode()
+        # PRC / PRD are not ascii85
+        cal[k] = float(s) / 100 if k in ('prc', 'prd') else a2n(s)
+    return cal
+
+
+
+def parse_header(bb):
+    # bb: macro-header bytes, first CS bytes of a LID file
+    bb = bytes(bb[:CS])
+    glt = bb[:3].decode()
+    file_version = bb[3]
+    timestamp = _time_bytes_to_str(bb[4:10])
+    bat = int.from_bytes(bb[10:12], "big")
+
+    spt = 0
+    if glt.startswith('DO'):
+        # position of DOX SPT depends on file version
+        if file_version <= 2:
+            spt = int(bb[200:205].decode())
+        else:
+            spt = int(bb[216:221].decode())
+
+    cc_area = bb[I_CC_AREA: I_CC_AREA + LEN_LIX_FILE_CC_AREA]
+    has_cc_area = cc_area[:5] == CC_AREA_TAG
+    cal = {}
+    cq = {'cqa': 0, 'cqb': 0, 'cqc': 0}
+    # no tag means no calibration to read, converters refuse such files
+    if glt in ('TDO', 'CTD') and has_cc_area:
+        cal = _parse_cc_area(cc_area)
+        # CTD constants only on newer file versions
+        if glt == 'CTD' and file_version >= 3:
+            i = I_CC_AREA + LEN_LIX_FILE_CC_AREA
+            cq_area = bb[i: i + LEN_LIX_FILE_CQ_AREA]
+            cq = {
+                'cqa': a2n(cq_area[0:5].decode()),
+                'cqb': a2n(cq_area[5:10].decode()),
+                'cqc': a2n(cq_area[10:15].decode()),
+            }
+
+    return LidHeader(
+        logger_type=glt,
+        file_version=file_version,
+        timestamp=timestamp,
+        epoch=_time_mah_str_to_seconds(timestamp),
+        battery=bat,
+        battery_mv=scale_battery(bat, glt),
+        header_index=bb[12],
+        has_cc_area=has_cc_area,
+        calibration=MappingProxyType(cal),
+        context=MappingProxyType(_parse_context(bb, file_version)),
+        cq=MappingProxyType(cq),
+        spt=spt,
+    )
+
+
+
+def read_header(p):
+    # p: LID file, only its first CS bytes are read, nothing is printed
+    with open(p, 'rb') as f:
+        return parse_header(f.read(CS))
+
+
+
+def get_calibration(bb):
+    # bb: macro-header bytes, or an already parsed LidHeader
+    # returns dictionary of calibration constants, empty for DOX loggers
+    h = bb if isinstance(bb, LidHeader) else parse_header(bb)
+    if not h.calibration:
+        return {}
+    cal = {k: h.calibration[k] for k in _CONVERSION_FIELDS}
+    cal.update(h.cq)
+    return cal
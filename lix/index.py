@@ -0,0 +1,171 @@
+import argparse
+import json
+import os
+import numpy as np
+from lix.convert import BatchConverter
+from lix.engine import (
+    LEN_PAYLOAD,
+    scan_masks,
+    dox_chunks_per_batch,
+    DT_TDO,
+    DT_CTD,
+    DT_DO1,
+    DT_DO2,
+)
+from lix.header import get_calibration
+from lix.stream import LidStream, BATCH_SIZE
+from lix.utils import time_to_epoch
+
+
+
+# one checkpoint every these many chunks, ~16 KB of data section
+INDEX_CHUNKS = 64
+INDEX_SUFFIX = '.lix_index.json'
+
+
+
+def index_path(p):
+    return p.replace('.lid', INDEX_SUFFIX)
+
+
+
+def checkpoints(st, n_chunks, batch_size):
+    # one pass over the masks, no sample is decoded, shard.py plans with it too
+    # returns rows of (payload position of the first mask in or after
+    # every n_chunks chunks, samples and cumulative time before it)
+    sl = DT_CTD.itemsize if st.glt == 'CTD' else DT_TDO.itemsize
+    step = n_chunks * LEN_PAYLOAD
+    rv = [(0, 0, 0)]
+    p = 0
+    nm = 0
+    ct = 0
+    done = False
+    while not done:
+        mv = st._data()
+        p0, nm0 = p, nm
+        ls_p, ls_t, ls_skip, nm, p, done = scan_masks(
+            mv, st.data_size, sl, p, nm, batch_size)
+        mv.release()
+        if not len(ls_p):
+            break
+
+        # where each mask starts, and time before each sample
+        starts = np.concatenate(([p0], ls_p[:-1] + sl))
+        et = np.where(ls_skip, 0, ls_t).astype(np.int64)
+        before = ct + np.concatenate(([0], np.cumsum(et)[:-1]))
+
+        b = np.arange(rv[-1][0] // step + 1, starts[-1] // step + 1) * step
+        for i in np.searchsorted(starts, b):
+            rv.append((int(starts[i]), nm0 + int(i), int(before[i])))
+        ct = int(before[-1] + et[-1])
+    return rv
+
+
+
+def build_index(p, n_chunks=INDEX_CHUNKS, batch_size=BATCH_SIZE):
+    # p: TDO / CTD file, writes its checkpoints next to it, returns them
+    # DOX files have fixed sample period and need no index
+    s = os.stat(p)
+    with LidStream(p) as st:
+        if st.glt not in ('TDO', 'CTD'):
+            return None
+        idx = {
+            'source': os.path.basename(p),
+            'size': s.st_size,
+            'mtime_ns': s.st_mtime_ns,
+            'n_chunks': n_chunks,
+            'epoch': st.epoch,
+            'checkpoints': checkpoints(st, n_chunks, batch_size),
+        }
+    with open(index_path(p), 'w') as f:
+        json.dump(idx, f)
+    return idx
+
+
+
+def load_index(p):
+    # returns index of p, None when missing or built for another version
+    try:
+        with open(index_path(p), 'r') as f:
+            idx = json.load(f)
+        s = os.stat(p)
+        if (idx['size'], idx['mtime_ns']) == (s.st_size, s.st_mtime_ns):
+            return idx
+    except (Exception, ):
+        pass
+    return None
+
+
+
+def _start_at(st, t0, idx):
+    # returns (payload position, samples, cumulative time) of a place
+    # before the first sample at or after time t0
+    ct0 = t0 - st.epoch
+    if st.glt.startswith('DO'):
+        if not st.spt or ct0 <= 0:
+            return 0, 0, 0
+        sl = DT_DO2.itemsize if st.glt == 'DO2' else DT_DO1.itemsize
+        g = dox_chunks_per_batch(st.glt)
+        k = int(ct0 // st.spt)
+        c0 = (k * sl // LEN_PAYLOAD) // g * g
+        nm = c0 * LEN_PAYLOAD // sl
+        return c0 * LEN_PAYLOAD, nm, nm * st.spt
+    if not idx:
+        return 0, 0, 0
+
+    # times never go back, but sample right before a checkpoint may be at
+    # its very time, so last checkpoint strictly before t0 is the good one
+    cp = idx['checkpoints']
+    i = int(np.searchsorted([c[2] for c in cp], ct0, side='left')) - 1
+    return tuple(cp[max(i, 0)])
+
+
+
+def read_time_range(p, t0=None, t1=None, index=True, batch_size=BATCH_SIZE):
+    # returns dictionary of converted columns with time in [t0, t1)
+    # t0, t1: seconds since 1970 or ISO 8601 strings, None means no limit
+    # index: use the sidecar index, building it when missing or stale
+    t0 = time_to_epoch(t0)
+    t1 = time_to_epoch(t1)
+    idx = None
+    if index and t0 is not None:
+        idx = load_index(p) or build_index(p)
+
+    ls = []
+    with LidStream(p) as st:
+        bc = BatchConverter(st.glt, st.epoch, get_calibration(st.header))
+        start = (0, 0, 0) if t0 is None else _start_at(st, t0, idx)
+        for d in st.batches(batch_size, start):
+            t = st.epoch + d['ct']
+            if t1 is not None and t[0] >= t1:
+                break
+            m = np.ones(len(t), dtype=bool)
+            if t0 is not None:
+                m &= t >= t0
+            if t1 is not None:
+                m &= t < t1
+            if m.any():
+                ls.append(bc.convert({k: v[m] for k, v in d.items()}))
+
+    if not ls:
+        return {}
+    return {k: np.concatenate([d[k] for d in ls]) for k in ls[0]}
+
+
+
+def main():
+    ap = argparse.ArgumentParser(description='build time indexes of LID files')
+    ap.add_argument('paths', nargs='+', help='.lid files')
+    ap.add_argument('-n', '--chunks', type=int, default=INDEX_CHUNKS,
+                    help='chunks between checkpoints')
+    args = ap.parse_args()
+    for p in args.paths:
+        idx = build_index(p, args.chunks)
+        if idx:
+            print(f"{index_path(p)}, {len(idx['checkpoints'])} checkpoints")
+    return 0
+
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,55 +1,49 @@
 import datetime
+import logging
 import os
-from lix.ascii85 import ascii85_to_num as a2n
+import time
 from lix.pressure import LixFileConverterP, prf_compensate_pressure
 from lix.temperature import LixFileConverterT
-from dateutil.tz import tzlocal, tzutc
+from lix.stream import LidStream
+from lix.header import get_calibration
+from lix.columnar import write_npy
+from lix.convert import BatchConverter, ExceptionLixFileConversion
+from lix.csv_writer import (
+    CSV_COLUMN_SETS, CsvWriter, ExceptionLixCsvColumns, check_columns
+)
+from lix.derived import latitude
+from lix.cache import cache_lookup, cache_store
+from lix.compress import compressed_path, open_output
+from lix.metrics import ConversionMetrics
+from lix.shard import convert_shards
+from lix.stats import DeploymentStats, write_stats
 import gsw
-from lix.utils import scale_battery
+from lix.utils import time_to_iso8601
 
 
 
 # file size, sample length, min. mask length, chunk size
 CS = 256
 MASK_TIME_EXTENDED = 0x40
-g_glt = ''
 LEN_LIX_FILE_CC_AREA = 5 * 33
 LEN_LIX_FILE_CF_AREA = 5 * 9
 LEN_LIX_FILE_CONTEXT = 64
 LEN_LIX_FILE_CONTEXT_V3 = 48
 MORE_COLUMNS = 1
-g_epoch = 0
-g_last_ct = 0
-
-
-
-def _p(s):
-    print(s)
+# 'numpy' decodes in bulk, 'sample' is the per-sample reference,
+# 'parallel' is 'numpy' on shards of the file, see shard.py
+ENGINES = ('numpy', 'sample', 'parallel')
 
 
 
+# quiet unless the application configures logging, see __init__.py
+log = logging.getLogger(__name__)
 
-def _time_mah_str_to_seconds(s: str) -> int:
-    # s: '231103190012' embedded in macro_header
-    dt = datetime.datetime.strptime(s, "%y%m%d%H%M%S")
-    # set dt as UTC since objects are 'naive' by default
-    dt_utc = dt.replace(tzinfo=tzutc())
-    dt_utc.astimezone(tzlocal())
-    rv = dt_utc.timestamp()
-    # rv: 1699038012
-    return int(rv)
 
 
+def _p(s):
+    log.debug(s)
 
-def _time_bytes_to_str(b: bytes) -> str:
-    # b: b'\x24\x01\x31\x12\x34\x56'
-    s = ''
-    for v in b:
-        high = (v & 0xf0) >> 4
-        low = (v & 0x0f) >> 0
-        s += f'{high}{low}'
-    # s: '240131123456'
-    return s
 
 
 
@@ -88,198 +82,6 @@ def do16_to_float(d):
 
 
 
-def _parse_macro_header(bb, abs_path_lid=None):
-    global g_glt
-    g_glt = ''
-    g_glt = bb[:3].decode()
-    file_type = bb[:3]
-    file_version = bb[3]
-    timestamp = bb[4:10]
-    battery = bb[10:12]
-    hdr_idx = bb[12]
-    # HSA macro-header must match firmware hsa.h
-    i_mah = 13
-
-
-
-    # display all this info
-    _p(f"\n\tMACRO header \t|  logger type {file_type.decode()}")
-    _p(f"\tfile version \t|  {file_version}")
-    timestamp_str = _time_bytes_to_str(timestamp)
-    _p(f"\tdatetime is   \t|  {timestamp_str}")
-    bat = int.from_bytes(battery, "big")
-    _p("\tbattery level \t|  0x{:04x} = {} mV -> {} mV"
-       .format(bat, bat, scale_battery(bat, g_glt)))
-    _p(f"\theader index \t|  {hdr_idx}")
-
-
-    # get first time ever
-    global g_epoch
-    g_epoch = _time_mah_str_to_seconds(timestamp_str)
-    # print('g_epoch', g_epoch)
-
-
-    # -----------------------------------
-    # macro_header
-    # -----------------------------------
-    #
-    # 0..13 general info
-    # cc_area (165 bytes)
-    # cq_area (15 bytes)
-
-
-    # CONTEXT area
-    if file_version == 2:
-        i = CS - LEN_LIX_FILE_CONTEXT
-    else:
-        i = CS - LEN_LIX_FILE_CONTEXT_V3
-    gfv = bb[i:i + 4]
-    i += 4
-    rvn = bb[i]
-    i += 1
-    pfm = bb[i]
-    i += 1
-    spn = bb[i]
-    i += 1
-    spt = bb[i:i + 5].decode()
-    i += 5
-    dro = bb[i:i + 5].decode()
-    i += 5
-    dru = bb[i:i + 5].decode()
-    i += 5
-    # DRF does not take 5 characters but 2
-    drf = bb[i:i + 2].decode()
-    i += 2
-    dso = bb[i:i + 5].decode()
-    i += 5
-    dsu = bb[i:i + 5].decode()
-
-    pad = '\t\t\t\t\t   '
-    _p("\tcontext \t\t|  detected")
-    _p(f'{pad}gfv = {gfv}')
-    if g_glt.startswith('DO'):
-        return
-
-
-    # CC area
-    cc_area = bb[i_mah: i_mah + LEN_LIX_FILE_CC_AREA]
-    if b"00004" != cc_area[:5]:
-        print('warning: no CC area detected')
-        return
-    _p("\tcc_area \t\t|  detected")
-    _p(f'{pad}tmr = {a2n(cc_area[10:15].decode())}')
-    _p(f'{pad}tma = {a2n(cc_area[15:20].decode())}')
-    _p(f'{pad}tmb = {a2n(cc_area[20:25].decode())}')
-    _p(f'{pad}tmc = {a2n(cc_area[25:30].decode())}')
-    _p(f'{pad}tmd = {a2n(cc_area[30:35].decode())}')
-    _p(f'{pad}pra = {a2n(cc_area[125:130].decode())}')
-    _p(f'{pad}prb = {a2n(cc_area[130:135].decode())}')
-    # PRC / PRD are not ascii85, also, we need them
-    prc = float(cc_area[135:140].decode()) / 100
-    prd = float(cc_area[140:145].decode()) / 100
-    _p(f'{pad}prc = {prc}')
-    _p(f'{pad}prd = {prd}')
-    _p(f'{pad}dco = {a2n(cc_area[145:150].decode())}')
-    _p(f'{pad}nco = {a2n(cc_area[150:155].decode())}')
-    _p(f'{pad}dhu = {a2n(cc_area[155:160].decode())}')
-    _p(f'{pad}dcd = {a2n(cc_area[160:165].decode())}')
-    _p("\n\tcontext \t\t|  detected")
-    _p(f'{pad}gfv = {gfv}')
-    _p(f'{pad}rvn = {rvn}')
-    _p(f'{pad}pfm = {pfm}')
-    _p(f'{pad}spn = {spn}')
-    _p(f'{pad}spt = {spt}')
-    _p(f'{pad}dro = {dro}')
-    _p(f'{pad}dru = {dru}')
-    _p(f'{pad}drf = {drf}')
-    _p(f'{pad}dso = {dso}')
-    _p(f'{pad}dsu = {dsu}')
-
-
-    # CQ area
-    cqa = cqb = cqc = 0
-    if g_glt == 'CTD' and file_version >= 3:
-        cq_area = bb[13 + LEN_LIX_FILE_CC_AREA: 13 + LEN_LIX_FILE_CC_AREA + 15]
-        cqa = a2n(cq_area[0:5].decode())
-        cqb = a2n(cq_area[5:10].decode())
-        cqc = a2n(cq_area[10:15].decode())
-        _p(f'{pad}cqa = {cqa}')
-        _p(f'{pad}cqb = {cqb}')
-        _p(f'{pad}cqc = {cqc}')
-
-
-
-
-    # create a bit of the new summary file
-    if not abs_path_lid:
-        return
-
-    try:
-        bn = os.path.basename(abs_path_lid)
-        abs_path_sum = abs_path_lid.replace('.lid', '.lih')
-        with open(abs_path_sum, 'w') as f:
-            f.write(f"\n\n")
-            f.write(f"---------------------------------------------------------\n")
-            f.write(f"header file for data file {bn}\n")
-            f.write(f"---------------------------------------------------------\n\n")
-            f.write(f"logger type   = {g_glt}\n")
-            f.write(f"firmware      = {gfv.decode()}\n")
-            f.write(f"file version  = {file_version}\n")
-            try:
-                _my_dt = datetime.datetime.strptime(timestamp_str, "%y%m%d%H%M%S")
-                f.write(f"timestamp     = {_my_dt.strftime('%B. %d, %Y at %H:%M:%S')}\n")
-            except (Exception, ):
-                f.write(f"timestamp     = {timestamp_str}/\n")
-            f.write(f"battery mV    = {scale_battery(bat, g_glt)}\n")
-            f.write(f"\ncalibration\n")
-            f.write(f'\ttmr = {a2n(cc_area[10:15].decode())}\n')
-            f.write(f'\ttma = {a2n(cc_area[15:20].decode())}\n')
-            f.write(f'\ttmb = {a2n(cc_area[20:25].decode())}\n')
-            f.write(f'\ttmc = {a2n(cc_area[25:30].decode())}\n')
-            f.write(f'\ttmd = {a2n(cc_area[30:35].decode())}\n')
-            f.write(f'\tpra = {a2n(cc_area[125:130].decode())}\n')
-            f.write(f'\tprb = {a2n(cc_area[130:135].decode())}\n')
-            # PRC / PRD are not ascii85, also, we need them
-            prc = float(cc_area[135:140].decode()) / 100
-            prd = float(cc_area[140:145].decode()) / 100
-            f.write(f'\tprc = {prc}\n')
-            f.write(f'\tprd = {prd}\n')
-            f.write(f'\tdco = {a2n(cc_area[145:150].decode())}\n')
-            f.write(f'\tnco = {a2n(cc_area[150:155].decode())}\n')
-            f.write(f'\tdhu = {a2n(cc_area[155:160].decode())}\n')
-            f.write(f'\tdcd = {a2n(cc_area[160:165].decode())}\n')
-            f.write(f"\nprofiling\n")
-            f.write(f'\trvn = {rvn}\n')
-            f.write(f'\tpfm = {pfm}\n')
-            f.write(f'\tspn = {spn}\n')
-            f.write(f'\tspt = {spt}\n')
-            f.write(f'\tdro = {dro}\n')
-            f.write(f'\tdru = {dru}\n')
-            f.write(f'\tdrf = {drf}\n')
-            f.write(f'\tdso = {dso}\n')
-            f.write(f'\tdsu = {dsu}\n')
-
-            if g_glt == 'CTD' and file_version >= 3:
-                f.write(f"\nconductivity\n")
-                f.write(f'\tcqa = {cqa}\n')
-                f.write(f'\tcqb = {cqb}\n')
-                f.write(f'\tcqc = {cqc}\n')
-
-
-            abs_path_gps = abs_path_lid.replace('.lid', '.gps')
-            if os.path.exists(abs_path_gps):
-                with open(abs_path_gps, 'r') as fg:
-                    s_gps = fg.read()
-                    s_gps = s_gps.split('\n')
-                f.write(f'\nGPS\n')
-                f.write(f'\t{s_gps[0]}\n')
-                f.write(f'\t{s_gps[1]}\n')
-    except (Exception, ) as e:
-        print(f"error when creating header file for {abs_path_lid} -> {e}")
-
-
-
-
 def _parse_mini_header(bb):
     pass
 
@@ -304,358 +106,651 @@ def _parse_mask(bb):
 
 
 
-def _parse_sample(bb, t, fo, lct, lcp, prc, prd, cqa, cqb, cqc):
-
-    # rt:  temperature raw ADC counts
-    # rp:  pressure raw ADC counts
-    # rpd: pressure raw decibar using PRA, PRB
-    # cp:  compensated pressure ADC counts
-    # cpd: compensated pressure decibar using PRA, PRB
-    # vt:  temperature as Celsius
-    rt = ''
-    rp = ''
-    cp = ''
-    vt = ''
-    rpd = ''
-    cpd = ''
-    vax = ''
-    vay = ''
-    vaz = ''
-
-
-    # all of them
-    global g_last_ct
-    g_last_ct += t
-    t_str = datetime.datetime.utcfromtimestamp(g_epoch + g_last_ct).isoformat()
-    t_str = t_str + '.000Z'
-
-
-    if g_glt in ('TDO', 'CTD'):
-        bb_t = bb[0:2]
-        rt = _decode_sensor_measurement('T', bb_t)
-        vt = '{:06.3f}'.format(float(lct.convert(rt)))
-        bb_p = bb[2:4]
-        rp = _decode_sensor_measurement('P', bb_p)
-        cp = prf_compensate_pressure(rp, rt, prc, prd)
-        rpd = '{:06.3f}'.format(lcp.convert(rp)[0])
-        cpd = '{:06.3f}'.format(lcp.convert(cp)[0])
-        bb_a = bb[4:10]
-        vax = _decode_sensor_measurement('A', bb_a[0:2])
-        vay = _decode_sensor_measurement('A', bb_a[2:4])
-        vaz = _decode_sensor_measurement('A', bb_a[4:6])
-
-
-    if g_glt == 'TDO':
-        if MORE_COLUMNS:
-            # et: elapsed time, ct: cumulative time
-            et = t
-            s = f'{t_str},{et},{g_last_ct},{rt},{rp},{vt},{rpd},{int(cp)},' \
-                f'{cpd},{vax},{vay},{vaz}\n'
-            fo.write(s)
-        else:
-            fo.write(f'{t_str},{vt},{cpd},{vax},{vay},{vaz}\n')
-
-
-    if g_glt == 'CTD':
-        # we skip T, P, Accelerometer samples
-        bb_c = bb[10:]
-        c2c1 = int.from_bytes(bb_c[0:2], byteorder='big', signed=False)
-        c1c2 = int.from_bytes(bb_c[2:4], byteorder='big', signed=False)
-        v1v2 = int.from_bytes(bb_c[4:6], byteorder='big', signed=False)
-        v2v1 = int.from_bytes(bb_c[6:8], byteorder='big', signed=False)
-        if v1v2 + v2v1 == 0:
-            s = f'warning, v1v2 + v2v1 == 0, skipping this sample'
-            print(f"\033[93m{s}\033[0m")
-            return
-
-
-        # calculate teos_10 in mS/cm, not S/m
-        ratio_cv = '{:.6f}'.format((c2c1 + c1c2) / (v1v2 + v2v1))
-        conductivity_s_m = (cqa * float(ratio_cv) * float(ratio_cv)) + (cqb * float(ratio_cv)) + cqc
-        print('conductivity s_m', conductivity_s_m)
-        conductivity_ms_cm = conductivity_s_m * 10
-        teos_10 = gsw.conversions.SP_from_C(conductivity_ms_cm, float(vt), float(cpd))
-        print(f"Salinity: {teos_10} TEOS-10")
 
+class LidParser:
+    # keeps all state of one conversion, so one instance per file
+    # allows converting many files at the same time in threads
+    def __init__(self):
+        self.glt = ''
+        self.epoch = 0
+        self.last_ct = 0
+        # number of samples in the last converted file
+        self.n_samples = 0
+        # 'iso' for ISO 8601 strings, 'epoch' for seconds since 1970
+        self.time_fmt = 'iso'
+        # files written by the last conversion, True when it was cached
+        self.outputs = []
+        self.cached = False
+        # timings and counters of the last conversion, see metrics.py
+        self.metrics = ConversionMetrics()
+        # per-sample engine statistics, see stats.py
+        self.stats = None
 
-        if MORE_COLUMNS:
-            # et: elapsed time, ct: cumulative time
-            et = t
-            s = f'{t_str},{et},{g_last_ct},{rt},{rp},{vt},{rpd},{cp},' \
-                f'{cpd},{vax},{vay},{vaz},{c2c1},{c1c2},{v1v2},{v2v1},' \
-                f'{ratio_cv},{conductivity_ms_cm:.3f},{teos_10:.3f}\n'
-        else:
-            s = (f'{t_str},{vt},{cpd},{vax},{vay},{vaz},{c2c1},{c1c2},{v1v2},{v2v1},'
-                 f'{ratio_cv},{conductivity_ms_cm:.3f},{teos_10:.3f}\n')
-        fo.write(s)
 
 
+    def _parse_macro_header(self, h, abs_path_lid=None):
+        # h: LidHeader, see header.py, here we only display and save it
+        self.glt = h.logger_type
+        ctx = h.context
+        cal = h.calibration
 
-def _parse_sample_dox(bb, ts, fo):
-    is_do2 = g_glt == 'DO2'
-    dos = do16_to_float(int.from_bytes(bb[0:2], "big"))
-    dop = do16_to_float(int.from_bytes(bb[2:4], "big"))
-    dot = do16_to_float(int.from_bytes(bb[4:6], "big"))
-    wat = 0
-    if is_do2:
-        # wat is directly in mV
-        wat = int.from_bytes(bb[6:8], "big")
-        wat = int((wat / 3000) * 100)
 
-    # only two decimals
-    dos = '{:.2f}'.format(dos)
-    dop = '{:.2f}'.format(dop)
-    dot = '{:.2f}'.format(dot)
-    wat = '{:.2f}'.format(wat)
+        # display all this info
+        _p(f"\n\tMACRO header \t|  logger type {h.logger_type}")
+        _p(f"\tfile version \t|  {h.file_version}")
+        _p(f"\tdatetime is   \t|  {h.timestamp}")
+        _p("\tbattery level \t|  0x{:04x} = {} mV -> {} mV"
+           .format(h.battery, h.battery, h.battery_mv))
+        _p(f"\theader index \t|  {h.header_index}")
 
 
-    # ts: seconds
-    t_str = datetime.datetime.utcfromtimestamp(ts).isoformat()
-    t_str = t_str + '.000Z'
+        # get first time ever
+        self.epoch = h.epoch
 
 
-    if is_do2:
-        s = f'{t_str},{dos},{dop},{dot},{wat}\n'
-    else:
-        s = f'{t_str},{dos},{dop},{dot}\n'
-    fo.write(s)
+        pad = '\t\t\t\t\t   '
+        _p("\tcontext \t\t|  detected")
+        _p(f'{pad}gfv = {h.firmware}')
+        if self.glt.startswith('DO'):
+            return
 
 
+        # CC area
+        if not h.has_cc_area:
+            log.warning('no CC area detected')
+            return
+        _p("\tcc_area \t\t|  detected")
+        for k, v in cal.items():
+            _p(f'{pad}{k} = {v}')
+        _p("\n\tcontext \t\t|  detected")
+        for k, v in ctx.items():
+            _p(f'{pad}{k} = {v}')
 
 
-class ExceptionLixFileConversion(Exception):
-    pass
+        # CQ area
+        if self.glt == 'CTD' and h.file_version >= 3:
+            for k, v in h.cq.items():
+                _p(f'{pad}{k} = {v}')
 
 
 
 
-def _parse_lid_v2_data_file_and_newer(p):
+        # create a bit of the new summary file
+        if not abs_path_lid:
+            return
 
-    if not p or not p.endswith('.lid'):
-        print(f'error, filename {p} does not end in .lid')
-        return 1
+        try:
+            bn = os.path.basename(abs_path_lid)
+            abs_path_sum = abs_path_lid.replace('.lid', '.lih')
+            self.outputs.append(abs_path_sum)
+            with open(abs_path_sum, 'w') as f:
+                f.write(f"\n\n")
+                f.write(f"---------------------------------------------------------\n")
+                f.write(f"header file for data file {bn}\n")
+                f.write(f"---------------------------------------------------------\n\n")
+                f.write(f"logger type   = {self.glt}\n")
+                f.write(f"firmware      = {h.firmware}\n")
+                f.write(f"file version  = {h.file_version}\n")
+                try:
+                    _my_dt = datetime.datetime.strptime(h.timestamp, "%y%m%d%H%M%S")
+                    f.write(f"timestamp     = {_my_dt.strftime('%B. %d, %Y at %H:%M:%S')}\n")
+                except (Exception, ):
+                    f.write(f"timestamp     = {h.timestamp}/\n")
+                f.write(f"battery mV    = {h.battery_mv}\n")
+                f.write(f"\ncalibration\n")
+                for k, v in cal.items():
+                    f.write(f'\t{k} = {v}\n')
+                f.write(f"\nprofiling\n")
+                for k, v in ctx.items():
+                    if k != 'gfv':
+                        f.write(f'\t{k} = {v}\n')
+
+                if self.glt == 'CTD' and h.file_version >= 3:
+                    f.write(f"\nconductivity\n")
+                    for k, v in h.cq.items():
+                        f.write(f'\t{k} = {v}\n')
+
+
+                abs_path_gps = abs_path_lid.replace('.lid', '.gps')
+                if os.path.exists(abs_path_gps):
+                    with open(abs_path_gps, 'r') as fg:
+                        s_gps = fg.read()
+                        s_gps = s_gps.split('\n')
+                    f.write(f'\nGPS\n')
+                    f.write(f'\t{s_gps[0]}\n')
+                    f.write(f'\t{s_gps[1]}\n')
+        except (Exception, ) as e:
+            log.error(f"error when creating header file for {abs_path_lid} -> {e}")
+
+
+
+    def _parse_sample(self, bb, t, fo, lct, lcp, prc, prd, cqa, cqb, cqc):
+        rt = _decode_sensor_measurement('T', bb[0:2])
+        rp = _decode_sensor_measurement('P', bb[2:4])
+        bb_a = bb[4:10]
+        vax = _decode_sensor_measurement('A', bb_a[0:2])
+        vay = _decode_sensor_measurement('A', bb_a[2:4])
+        vaz = _decode_sensor_measurement('A', bb_a[4:6])
+        cw = None
+        if self.glt == 'CTD':
+            # we skip T, P, Accelerometer samples
+            bb_c = bb[10:]
+            c2c1 = int.from_bytes(bb_c[0:2], byteorder='big', signed=False)
+            c1c2 = int.from_bytes(bb_c[2:4], byteorder='big', signed=False)
+            v1v2 = int.from_bytes(bb_c[4:6], byteorder='big', signed=False)
+            v2v1 = int.from_bytes(bb_c[6:8], byteorder='big', signed=False)
+            cw = (c2c1, c1c2, v1v2, v2v1)
+        self._write_sample(rt, rp, vax, vay, vaz, cw, t, fo,
+                           lct, lcp, prc, prd, cqa, cqb, cqc)
 
 
-    # read ALL bytes in LID data file
-    with open(p, 'rb') as f:
-        bb = f.read()
-    bn = os.path.basename(p)
-    raw_file_size = len(bb)
 
+    def _write_sample(self, rt, rp, vax, vay, vaz, cw, t, fo,
+                      lct, lcp, prc, prd, cqa, cqb, cqc):
 
-    # know real size of LID file by subtracting last padding
-    n_pad = bb[-253]
-    # file_size = raw_file_size - 256 + (256 - n_pad)
-    file_size = raw_file_size - n_pad
-    print(f'{bn}, raw size {raw_file_size}, real size {file_size}')
+        # rt:  temperature raw ADC counts
+        # rp:  pressure raw ADC counts
+        # rpd: pressure raw decibar using PRA, PRB
+        # cp:  compensated pressure ADC counts
+        # cpd: compensated pressure decibar using PRA, PRB
+        # vt:  temperature as Celsius
+        # cw:  CTD c2c1, c1c2, v1v2, v2v1 words
 
 
-    # separate macro_header
-    bb_macro_header = bb[:CS]
-    _parse_macro_header(bb_macro_header, abs_path_lid=p)
-    file_version = bb_macro_header[3]
+        # all of them
+        self.last_ct += t
+        t_str = self._time_str(self.epoch + self.last_ct)
 
 
-    # --------------------------------------------
-    # CSV column titles depending on logger type
-    # --------------------------------------------
+        f_vt = float(lct.convert(rt))
+        vt = '{:06.3f}'.format(f_vt)
+        cp = prf_compensate_pressure(rp, rt, prc, prd)
+        rpd = '{:06.3f}'.format(lcp.convert(rp)[0])
+        f_cpd = lcp.convert(cp)[0]
+        cpd = '{:06.3f}'.format(f_cpd)
+        v = {'vt': f_vt, 'cpd': f_cpd, 'ax': vax, 'ay': vay, 'az': vaz}
+
+
+        if self.glt == 'TDO':
+            if MORE_COLUMNS:
+                # et: elapsed time, ct: cumulative time
+                et = t
+                s = f'{t_str},{et},{self.last_ct},{rt},{rp},{vt},{rpd},{int(cp)},' \
+                    f'{cpd},{vax},{vay},{vaz}\n'
+                fo.write(s)
+            else:
+                fo.write(f'{t_str},{vt},{cpd},{vax},{vay},{vaz}\n')
+            self.stats.add_sample(self.epoch + self.last_ct, v)
 
-    if g_glt == 'TDO':
-        sl = 10
-        csv_column_titles = 'ISO 8601 Time,' \
-               'Temperature (C),Pressure (dbar),Ax,Ay,Az\n'
-        if MORE_COLUMNS:
-            csv_column_titles = 'ISO 8601 Time,elapsed time (s),agg. time(s),' \
-                   'raw ADC Temp,raw ADC Pressure,' \
-                   'Temperature (C),Pressure (dbar),Compensated ADC Pressure,' \
-                   'Compensated Pressure (dbar),Ax,Ay,Az\n'
-        suffix = 'TDO'
 
-    elif g_glt == 'CTD':
-        sl = 18
-        csv_column_titles = 'ISO 8601 Time,' \
-                'Temperature (C),Pressure (dbar),Ax,Ay,Az,c2c1,c1c2,v1v2,v2v1,ratio_cv,'\
-                'Conductivity (mS/cm),Salinity (TEOS-10)\n'
-        if MORE_COLUMNS:
-            csv_column_titles = 'ISO 8601 Time,elapsed time (s),agg. time(s),' \
-                   'raw ADC Temp,raw ADC Pressure,' \
-                   'Temperature (C),Pressure (dbar),Compensated ADC Pressure,' \
-                   'Compensated Pressure (dbar),Ax,Ay,Az,c2c1,c1c2,v1v2,v2v1,ratio_cv,'\
-                   'Conductivity (mS/cm),Salinity (TEOS-10)\n'
-        suffix = 'CTD'
+        if self.glt == 'CTD':
+            c2c1, c1c2, v1v2, v2v1 = cw
+            if v1v2 + v2v1 == 0:
+                log.debug('v1v2 + v2v1 == 0, skipping this sample')
+                self.metrics.n_skipped_cv += 1
+                return
 
-    elif g_glt.startswith('DO'):
-        sl = 6
-        csv_column_titles = 'ISO 8601 Time,' \
-               'Dissolved Oxygen (mg/l),Dissolved Oxygen (%),' \
-               'DO Temperature (C)\n'
-        if g_glt == 'DO2':
-            sl = 8
-            csv_column_titles = csv_column_titles.replace('\n', ',Water Detect (%)\n')
-        suffix = 'DissolvedOxygen'
 
-    else:
-        e = f'lix: _parse_lid_v2_data_file_v2_and_up, cannot get logger type = {g_glt}'
-        raise ExceptionLixFileConversion(e)
-
-
-    # start CSV file with its column titles
-    path_csv = p.replace('.lid', f'_{suffix}.csv')
-    print(f'output csv file = {path_csv}')
-    f_csv = open(path_csv, 'w')
-    f_csv.write(csv_column_titles)
-
-
-    # grab the cc area in the macro_header
-    lct = 0
-    lcp = 0
-    prc = 0
-    prd = 0
-    if g_glt in ('TDO', 'CTD'):
-        cc_area = bb[13: 13 + LEN_LIX_FILE_CC_AREA]
-        tmr = a2n(cc_area[10:15].decode())
-        tma = a2n(cc_area[15:20].decode())
-        tmb = a2n(cc_area[20:25].decode())
-        tmc = a2n(cc_area[25:30].decode())
-        tmd = a2n(cc_area[30:35].decode())
-        pra = a2n(cc_area[125:130].decode())
-        prb = a2n(cc_area[130:135].decode())
-        prc = float(cc_area[135:140].decode()) / 100
-        prd = float(cc_area[140:145].decode()) / 100
-        lct = LixFileConverterT(tma, tmb, tmc, tmd, tmr)
-        lcp = LixFileConverterP(pra, prb)
-
-
-
-    # grab CTD constants on newer file versions
-    cqa = cqb = cqc = 0
-    if g_glt == 'CTD' and file_version >= 3:
-        # 15 is the length of the conductivity calibration constants
-        cq_area = bb[13 + LEN_LIX_FILE_CC_AREA: 13 + LEN_LIX_FILE_CC_AREA + 15]
-        cqa = a2n(cq_area[0:5].decode())
-        cqb = a2n(cq_area[5:10].decode())
-        cqc = a2n(cq_area[10:15].decode())
-        # print(f'debug cqa = {cqa} = {cq_area[0:5]}')
-        # print(f'debug cqb = {cqb} = {cq_area[5:10]}')
-        # print(f'debug cqc = {cqc} = {cq_area[10:15]}')
-
-
-
-    # grab SPT in DOX header
-    spt = 0
-    if g_glt.startswith('DO'):
-        if file_version <= 2:
-            spt = int(bb_macro_header[200:205].decode())
-        else:
-            # >= 3
-            spt = int(bb_macro_header[216:221].decode())
-        print(f'DOX spt = {spt}')
+            # calculate teos_10 in mS/cm, not S/m
+            ratio_cv = '{:.6f}'.format((c2c1 + c1c2) / (v1v2 + v2v1))
+            r = float(ratio_cv)
+            conductivity_s_m = (cqa * r * r) + (cqb * r) + cqc
+            conductivity_ms_cm = conductivity_s_m * 10
+            teos_10 = gsw.conversions.SP_from_C(conductivity_ms_cm, float(vt), float(cpd))
 
 
+            if MORE_COLUMNS:
+                # et: elapsed time, ct: cumulative time
+                et = t
+                s = f'{t_str},{et},{self.last_ct},{rt},{rp},{vt},{rpd},{cp},' \
+                    f'{cpd},{vax},{vay},{vaz},{c2c1},{c1c2},{v1v2},{v2v1},' \
+                    f'{ratio_cv},{conductivity_ms_cm:.3f},{teos_10:.3f}\n'
+            else:
+                s = (f'{t_str},{vt},{cpd},{vax},{vay},{vaz},{c2c1},{c1c2},{v1v2},{v2v1},'
+                     f'{ratio_cv},{conductivity_ms_cm:.3f},{teos_10:.3f}\n')
+            fo.write(s)
+            v['con'] = conductivity_ms_cm
+            v['sal'] = teos_10
+            self.stats.add_sample(self.epoch + self.last_ct, v)
 
-    # separate DATA section from rest of file
-    bb = bb[CS:-n_pad]
-    data_size = len(bb)
 
 
-    # initialize variables to parse data section
-    global g_last_ct
-    g_last_ct = 0
-    i = 0
-    need_parse_mini = 1
+    def _parse_sample_dox(self, bb, ts, fo):
+        is_do2 = self.glt == 'DO2'
+        dos = do16_to_float(int.from_bytes(bb[0:2], "big"))
+        dop = do16_to_float(int.from_bytes(bb[2:4], "big"))
+        dot = do16_to_float(int.from_bytes(bb[4:6], "big"))
+        wat = 0
+        if is_do2:
+            # wat is directly in mV
+            wat = int.from_bytes(bb[6:8], "big")
+            wat = int((wat / 3000) * 100)
 
+        self.stats.add_sample(ts, {'dos': dos, 'dop': dop, 'dot': dot,
+                                   'wat': wat})
 
-    # minimal mask length
-    min_mask_len = 1
-    if g_glt == 'DO2':
-        min_mask_len = 0
+        # only two decimals
+        dos = '{:.2f}'.format(dos)
+        dop = '{:.2f}'.format(dop)
+        dot = '{:.2f}'.format(dot)
+        wat = '{:.2f}'.format(wat)
 
 
-    # --------------------------------------
-    # parse data measurement by measurement
-    # --------------------------------------
-    nm = 0
-    while 1:
+        # ts: seconds
+        t_str = self._time_str(ts)
 
-        skip_this_sample = False
 
-        if i + sl + min_mask_len >= data_size:
-            print(f'💚 finished {g_glt} file parsing')
-            print(f'\t{nm} samples\n\ti = {i}\n'
-                  f'\tdata_size = {data_size}\n\tsample length = {sl}')
-            break
+        if is_do2:
+            s = f'{t_str},{dos},{dop},{dot},{wat}\n'
+        else:
+            s = f'{t_str},{dos},{dop},{dot}\n'
+        fo.write(s)
 
-        if i % CS == 0:
-            need_parse_mini = 1
-            i += 8
-            # print(f'{i - 8} - {i} (8)')
 
-        if need_parse_mini:
-            m = (i // CS) * CS
-            _parse_mini_header(bb[m:m+8])
 
+    def _time_str(self, ts):
+        if self.time_fmt == 'epoch':
+            return str(ts)
+        return time_to_iso8601(ts)
+
+
+
+    def parse(self, p, engine='numpy', fmt='csv', time_fmt='iso',
+              columns=None, precision=None, cache=False, force=False,
+              compression=None, n_workers=None, derived=None):
+        # columns: 'compact', 'extended' or list of names, see csv_writer.py
+        # precision: None keeps usual CSV formats, n writes floats as %.nf
+        # cache: skip files whose outputs are current, force: convert anyway
+        # compression: None, 'gzip', 'bz2' or 'lzma' for CSV, see compress.py
+        # n_workers: processes of engine 'parallel', None means one per core
+        # derived: derived channels to add, i.e. ['depth', 'tilt'], see derived.py
+        if engine not in ENGINES:
+            e = f'lix: unknown engine {engine}, use one of {list(ENGINES)}'
+            raise ExceptionLixFileConversion(e)
+        if columns is None:
+            columns = 'extended' if MORE_COLUMNS else 'compact'
+        self.outputs = []
+        self.cached = False
+        self.metrics = ConversionMetrics()
+
+        # engines differ on DO1 files, so outputs of one are not another's
+        options = {
+            'engine': engine,
+            'fmt': fmt,
+            'time_fmt': time_fmt,
+            'columns': columns,
+            'precision': precision,
+            'compression': compression,
+            'derived': derived,
+        }
+        if cache and not force and p and p.endswith('.lid'):
+            e = cache_lookup(p, options)
+            if e:
+                log.info(f'{os.path.basename(p)}, outputs are current, skipping')
+                self.n_samples = e['n_samples']
+                self.cached = True
+                return 0
+
+        rv = self._parse(p, engine, fmt, time_fmt, columns, precision,
+                         compression, n_workers, derived)
+        log.info(f'{os.path.basename(p)}, metrics {self.metrics}')
+        if cache and rv == 0:
+            cache_store(p, options, self.outputs, self.n_samples)
+        return rv
+
+
+
+    def _parse(self, p, engine, fmt, time_fmt, columns, precision,
+               compression=None, n_workers=None, derived=None):
+        self.time_fmt = time_fmt
+        if not p or not p.endswith('.lid'):
+            log.error(f'error, filename {p} does not end in .lid')
+            return 1
+        if derived and engine == 'sample':
+            log.error('error, derived channels need engine numpy or parallel')
+            return 1
+
+
+        # memory-map LID data file, bytes are read only when used
+        mt = self.metrics
+        with mt.stage('read'):
+            st = LidStream(p)
+        bb = st.mm
+        bn = os.path.basename(p)
+        raw_file_size = len(bb)
+
+
+        # know real size of LID file by subtracting last padding
+        n_pad = bb[-253]
+        # file_size = raw_file_size - 256 + (256 - n_pad)
+        file_size = raw_file_size - n_pad
+        mt.n_bytes = raw_file_size
+        log.info(f'{bn}, raw size {raw_file_size}, real size {file_size}')
+
+
+        # macro_header was decoded once, when opening the stream
+        h = st.header
+        with mt.stage('header'):
+            self._parse_macro_header(h, abs_path_lid=p)
+        if self.glt in ('TDO', 'CTD') and not h.has_cc_area:
+            st.close()
+            e = f'lix: {bn} has no CC area, cannot convert it without calibration'
+            raise ExceptionLixFileConversion(e)
+
+
+        # columnar output, one typed .npy file per column, never compressed
+        if fmt == 'npy':
+            st.close()
+            ds = DeploymentStats(self.glt, derived)
+            m = write_npy(p, metrics=mt, derived=derived, stats=ds)
+            self.n_samples = m['n_samples']
+            self.outputs.append(p.replace('.lid', '_npy'))
+            self.outputs.append(write_stats(p, ds.to_dict(mt)))
+            log.info(f"output npy folder = {p.replace('.lid', '_npy')}")
+            return 0
+
+
+        # --------------------------------------------
+        # CSV column titles depending on logger type
+        # --------------------------------------------
+
+        if self.glt == 'TDO':
+            sl = 10
+            csv_column_titles = 'ISO 8601 Time,' \
+                   'Temperature (C),Pressure (dbar),Ax,Ay,Az\n'
+            if MORE_COLUMNS:
+                csv_column_titles = 'ISO 8601 Time,elapsed time (s),agg. time(s),' \
+                       'raw ADC Temp,raw ADC Pressure,' \
+                       'Temperature (C),Pressure (dbar),Compensated ADC Pressure,' \
+                       'Compensated Pressure (dbar),Ax,Ay,Az\n'
+            suffix = 'TDO'
+
+        elif self.glt == 'CTD':
+            sl = 18
+            csv_column_titles = 'ISO 8601 Time,' \
+                    'Temperature (C),Pressure (dbar),Ax,Ay,Az,c2c1,c1c2,v1v2,v2v1,ratio_cv,'\
+                    'Conductivity (mS/cm),Salinity (TEOS-10)\n'
+            if MORE_COLUMNS:
+                csv_column_titles = 'ISO 8601 Time,elapsed time (s),agg. time(s),' \
+                       'raw ADC Temp,raw ADC Pressure,' \
+                       'Temperature (C),Pressure (dbar),Compensated ADC Pressure,' \
+                       'Compensated Pressure (dbar),Ax,Ay,Az,c2c1,c1c2,v1v2,v2v1,ratio_cv,'\
+                       'Conductivity (mS/cm),Salinity (TEOS-10)\n'
+            suffix = 'CTD'
+
+        elif self.glt.startswith('DO'):
+            sl = 6
+            csv_column_titles = 'ISO 8601 Time,' \
+                   'Dissolved Oxygen (mg/l),Dissolved Oxygen (%),' \
+                   'DO Temperature (C)\n'
+            if self.glt == 'DO2':
+                sl = 8
+                csv_column_titles = csv_column_titles.replace('\n', ',Water Detect (%)\n')
+            suffix = 'DissolvedOxygen'
 
-        if g_glt in ('TDO', 'CTD'):
-            # step 1) parse TDO / CTD mask (DOX loggers have no mask)
-            n_mask, t = _parse_mask(bb[i:i+2])
+        else:
+            e = f'lix: _parse_lid_v2_data_file_v2_and_up, cannot get logger type = {self.glt}'
+            raise ExceptionLixFileConversion(e)
 
-            if t == 0 and nm > 0:
-                if i > data_size - CS:
-                    # this should NOT happen
-                    print(f'💛 early finished {g_glt} file parsing = {nm} samples')
-                    print(f'\t{nm} samples\n\ti = {i}\n'
-                          f'\tdata_size = {data_size}\n\tsample length = {sl}')
-                    break
 
-                # detect bad memory blocks or 2 samples in one period
-                print(f'⚫ skipped: conversion, t = {t}, i = {i}, z = {data_size}')
-                skip_this_sample = True
+        if time_fmt == 'epoch':
+            csv_column_titles = csv_column_titles.replace(
+                'ISO 8601 Time', 'Epoch Time (s)', 1)
 
 
-            # does current measurement fit in the current chunk
-            if (i % CS) + n_mask + sl > CS:
-                n_pre = CS - (i % CS)
-                n_post = sl + n_mask - n_pre
-                j = i + n_pre + 8
-                s = bb[i:i+n_pre] + bb[j:j+n_post]
-                # print(f'{i} - {i+n_pre} ({n_pre}) + {j}:{j+n_post} ({n_post})')
-                j += n_post
-                need_parse_mini = 1
+        # start CSV file with its column titles, compressed on the fly,
+        # bad columns are reported before the file exists
+        try:
+            if engine == 'sample':
+                _check_sample_columns(self.glt, columns, precision)
             else:
-                j = i + n_mask + sl
-                s = bb[i:j]
-                # print(f'{i} - {j} ({j - i})')
-                need_parse_mini = 0
-
+                check_columns(self.glt, columns, derived)
+        except ExceptionLixCsvColumns:
+            st.close()
+            raise
+        path_csv = p.replace('.lid', f'_{suffix}.csv')
+        f_csv = open_output(path_csv, compression)
+        path_csv = compressed_path(path_csv, compression)
+        log.info(f'output csv file = {path_csv}')
+        self.outputs.append(path_csv)
+
+
+        # grab the cc area in the macro_header, CQ one for newer CTD files
+        lct = 0
+        lcp = 0
+        cal = get_calibration(h)
+        prc = cal.get('prc', 0)
+        prd = cal.get('prd', 0)
+        cqa = cal.get('cqa', 0)
+        cqb = cal.get('cqb', 0)
+        cqc = cal.get('cqc', 0)
+        if cal:
+            lct = LixFileConverterT(cal['tma'], cal['tmb'], cal['tmc'],
+                                    cal['tmd'], cal['tmr'])
+            lcp = LixFileConverterP(cal['pra'], cal['prb'])
+
+
+
+        # grab SPT in DOX header
+        spt = h.spt
+        if self.glt.startswith('DO'):
+            log.debug(f'DOX spt = {spt}')
+
+
+
+        # one file on many cores, shards of it stitched after titles
+        if engine == 'parallel':
+            with mt.stage('header'):
+                w = CsvWriter(f_csv, self.glt, columns, precision, time_fmt,
+                              derived)
+                w.write_header()
+                f_csv.close()
+            st.close()
+            ds = DeploymentStats(self.glt, derived)
+            r = convert_shards(p, path_csv, columns, precision, time_fmt,
+                               compression, n_workers, metrics=mt,
+                               derived=derived, stats=ds)
+            if r['n_skipped_cv']:
+                log.warning(f"v1v2 + v2v1 == 0, skipped {r['n_skipped_cv']} samples")
+            log.info(f"finished {self.glt} file parsing, {r['n_shards']} shards, "
+                     f"{r['n_samples']} samples, skipped = {r['n_skipped']}")
+            self.n_samples = r['n_samples']
+            self.outputs.append(write_stats(p, ds.to_dict(mt)))
+            return 0
+
+
+        # data sections are decoded in batches by default
+        if engine == 'numpy':
+            with mt.stage('header'):
+                bc = BatchConverter(self.glt, self.epoch, cal, derived,
+                                    latitude(p))
+                w = CsvWriter(f_csv, self.glt, columns, precision, time_fmt,
+                              derived)
+                w.write_header()
+                ds = DeploymentStats(self.glt, derived)
+            for d in mt.timed('demux', st.batches()):
+                with mt.stage('calibration'):
+                    d = bc.convert(d)
+                with mt.stage('stats'):
+                    ds.add(d)
+                with mt.stage('formatting'):
+                    s = w.format(d)
+                with mt.stage('write'):
+                    f_csv.write(s)
+            if bc.n_skipped_cv:
+                log.warning(f'v1v2 + v2v1 == 0, skipped {bc.n_skipped_cv} samples')
+            log.info(f'finished {self.glt} file parsing, '
+                     f'{st.n_samples} samples, skipped = {st.n_skipped}, '
+                     f'data_size = {st.data_size}, sample length = {sl}')
+            self.n_samples = st.n_samples
+            mt.n_samples = st.n_samples
+            mt.n_skipped = st.n_skipped
+            mt.n_skipped_cv = bc.n_skipped_cv
+            mt.n_straddling = st.n_straddling
+            f_csv.close()
+            st.close()
+            self.outputs.append(write_stats(p, ds.to_dict(mt)))
+            return 0
+
+
+        # per-sample path writes the column set chosen by MORE_COLUMNS
+        f_csv.write(csv_column_titles)
+
+
+        # separate DATA section from rest of file
+        bb = bb[CS:-n_pad]
+        data_size = len(bb)
+        st.close()
+
+
+        # initialize variables to parse data section, one sample at a time
+        self.last_ct = 0
+        self.stats = DeploymentStats(self.glt)
+        i = 0
+        need_parse_mini = 1
+
+
+        # minimal mask length
+        min_mask_len = 1
+        if self.glt == 'DO2':
+            min_mask_len = 0
+
+
+        # --------------------------------------
+        # parse data measurement by measurement
+        # --------------------------------------
+        # this loop decodes, converts and writes, all of it goes to demux
+        t0 = time.perf_counter()
+        nm = 0
+        while 1:
+
+            skip_this_sample = False
+
+            if i + sl + min_mask_len >= data_size:
+                log.info(f'finished {self.glt} file parsing, {nm} samples, '
+                         f'i = {i}, data_size = {data_size}, sample length = {sl}')
+                break
+
+            if i % CS == 0:
+                need_parse_mini = 1
+                i += 8
+                # print(f'{i - 8} - {i} (8)')
+
+            if need_parse_mini:
+                m = (i // CS) * CS
+                _parse_mini_header(bb[m:m+8])
+
+
+            if self.glt in ('TDO', 'CTD'):
+                # step 1) parse TDO / CTD mask (DOX loggers have no mask)
+                n_mask, t = _parse_mask(bb[i:i+2])
+
+                if t == 0 and nm > 0:
+                    if i > data_size - CS:
+                        # this should NOT happen
+                        log.warning(f'early finished {self.glt} file parsing, '
+                                    f'{nm} samples, i = {i}, data_size = {data_size}, '
+                                    f'sample length = {sl}')
+                        break
+
+                    # detect bad memory blocks or 2 samples in one period
+                    log.debug(f'skipped: conversion, t = {t}, i = {i}, z = {data_size}')
+                    skip_this_sample = True
+                    mt.n_skipped += 1
+
+
+                # does current measurement fit in the current chunk
+                if (i % CS) + n_mask + sl > CS:
+                    n_pre = CS - (i % CS)
+                    n_post = sl + n_mask - n_pre
+                    j = i + n_pre + 8
+                    s = bb[i:i+n_pre] + bb[j:j+n_post]
+                    # print(f'{i} - {i+n_pre} ({n_pre}) + {j}:{j+n_post} ({n_post})')
+                    j += n_post
+                    need_parse_mini = 1
+                    mt.n_straddling += 1
+                else:
+                    j = i + n_mask + sl
+                    s = bb[i:j]
+                    # print(f'{i} - {j} ({j - i})')
+                    need_parse_mini = 0
+
+
+                # step 2) parse TDO / CTD sample 's'
+                if not skip_this_sample:
+                    self._parse_sample(
+                        s[n_mask:], t, f_csv,
+                        lct, lcp, prc, prd,
+                        cqa, cqb, cqc
+                    )
+                i = j
 
-            # step 2) parse TDO / CTD sample 's'
-            if not skip_this_sample:
-                _parse_sample(
-                    s[n_mask:], t, f_csv,
-                    lct, lcp, prc, prd,
-                    cqa, cqb, cqc
-                )
-            i = j
+            else:
+                # DOX loggers have no mask
+                if (i % CS) + sl > CS:
+                    mt.n_straddling += 1
+                ts = self.epoch + (nm * spt)
+                self._parse_sample_dox(bb[i:i+sl], ts, f_csv)
+                i += sl
 
-        else:
-            # DOX loggers have no mask
-            ts = g_epoch + (nm * spt)
-            _parse_sample_dox(bb[i:i+sl], ts, f_csv)
-            i += sl
+            # number of measurements
+            nm += 1
 
-        # number of measurements
-        nm += 1
+        mt.seconds['demux'] += time.perf_counter() - t0
+        self.n_samples = nm
+        mt.n_samples = nm
+        f_csv.close()
+        self.outputs.append(write_stats(p, self.stats.to_dict(mt)))
 
-    f_csv.close()
 
+        # useful during development, copy converted file here
+        # c = f'cp {path_csv} .'
+        # sp.run(c, shell=True)
 
-    # useful during development, copy converted file here
-    # c = f'cp {path_csv} .'
-    # sp.run(c, shell=True)
+        return 0
 
-    return 0
 
 
 
-def parse_lid_v2_data_file(p):
-    return _parse_lid_v2_data_file_and_newer(p)
+def _check_sample_columns(glt, columns, precision):
+    # per-sample path only writes the column set chosen by MORE_COLUMNS,
+    # with usual formats, others would be silently ignored
+    fixed = 'extended' if MORE_COLUMNS else 'compact'
+    if isinstance(columns, str):
+        ls = CSV_COLUMN_SETS.get((glt, columns))
+    else:
+        ls = list(columns)
+    if ls != CSV_COLUMN_SETS[(glt, fixed)] or precision is not None:
+        e = f'lix: engine sample writes {fixed} columns with usual formats only, ' \
+            f'use engine numpy for columns {columns}, precision {precision}'
+        raise ExceptionLixCsvColumns(e)
+
+
+
+def _parse_lid_v2_data_file_and_newer(p, engine='numpy', fmt='csv',
+                                      time_fmt='iso', columns=None,
+                                      precision=None, cache=False,
+                                      force=False, compression=None,
+                                      n_workers=None, derived=None):
+    return LidParser().parse(p, engine, fmt, time_fmt, columns, precision,
+                             cache, force, compression, n_workers, derived)
+
+
+
+def parse_lid_v2_data_file(p, engine='numpy', fmt='csv', time_fmt='iso',
+                           columns=None, precision=None, cache=False,
+                           force=False, compression=None, n_workers=None,
+                           derived=None):
+    # engine: 'numpy' decodes in bulk, 'sample' is the per-sample reference,
+    # 'parallel' is 'numpy' on shards of the file, one per core, see shard.py
+    # fmt: 'csv' text file, 'npy' folder of typed columns plus manifest
+    # time_fmt: 'iso' for ISO 8601 CSV times, 'epoch' for seconds since 1970
+    # columns: 'compact', 'extended' or a list of CSV column names
+    # precision: None keeps usual CSV formats, n writes floats as %.nf
+    # cache: skip when outputs are current, see cache.py, force: never skip
+    # compression: None, 'gzip', 'bz2' or 'lzma', CSV goes to .gz, .bz2, .xz
+    # n_workers: processes of 'parallel' engine, None means one per core
+    # derived: derived channels to add, i.e. ['depth', 'tilt'], see derived.py
+    return _parse_lid_v2_data_file_and_newer(p, engine, fmt, time_fmt,
+                                             columns, precision, cache, force,
+                                             compression, n_workers, derived)
@@ -0,0 +1,175 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+from lix.compress import COMPRESSION, compressed_path, open_output
+from lix.convert import BatchConverter
+from lix.csv_writer import CsvWriter
+from lix.header import get_calibration, read_header
+from lix.stream import LidStream, BATCH_SIZE
+
+
+
+# seconds between two files of a logger above which we flag a gap
+MERGE_MAX_GAP = 3600
+# file names as '2699991_APP_20260430_210129.lid' start with the serial
+_RE_SERIAL = re.compile(r'^(\d+)_')
+
+
+log = logging.getLogger(__name__)
+
+
+
+class ExceptionLixMerge(Exception):
+    pass
+
+
+
+def _serial(p):
+    m = _RE_SERIAL.match(os.path.basename(p))
+    return m.group(1) if m else None
+
+
+
+def group_key(p, h, by='serial'):
+    # by: 'serial' uses the file name, 'header' logger type and calibration,
+    # which no two loggers share, files with no serial in name use it too
+    s = _serial(p) if by == 'serial' else None
+    if s:
+        return f'{s}_{h.logger_type}'
+    cal = json.dumps([dict(h.calibration), dict(h.cq)], sort_keys=True)
+    return f'{h.logger_type}_{hashlib.sha256(cal.encode()).hexdigest()[:8]}'
+
+
+
+def group_lid_files(ls, by='serial'):
+    # returns {key: [paths ordered by macro-header time]}
+    g = {}
+    for p in ls:
+        h = read_header(p)
+        g.setdefault(group_key(p, h, by), []).append((h.epoch, p))
+    return {k: [p for _, p in sorted(v)] for k, v in g.items()}
+
+
+
+def _flag(rv, p, t_last, t_first, max_gap):
+    # t_last: last sample time written before file p, t_first: its first one
+    if t_last is None:
+        return
+    if t_first <= t_last:
+        rv['overlaps'].append({'path': p, 'seconds': t_last - t_first})
+        log.warning(f'{p} overlaps previous file by {t_last - t_first} s')
+    elif t_first - t_last > max_gap:
+        rv['gaps'].append({'path': p, 'seconds': t_first - t_last})
+        log.warning(f'{p} starts {t_first - t_last} s after previous file')
+
+
+
+def merge_lid_files(ls, out, columns='extended', time_fmt='iso',
+                    max_gap=MERGE_MAX_GAP, overlap='drop',
+                    batch_size=BATCH_SIZE, compression=None):
+    # ls: LID files of one logger, merged in macro-header time order
+    # out: CSV file to write, one batch in memory at a time
+    # compression: None, 'gzip', 'bz2' or 'lzma', out gets its extension
+    # overlap: 'drop' writes only samples after the last written one, so
+    # output is always in time order, 'keep' writes all of them
+    ls = sorted(ls, key=lambda p: read_header(p).epoch)
+    rv = {
+        'out': compressed_path(out, compression),
+        'logger_type': '',
+        'n_rows': 0,
+        'files': [],
+        'gaps': [],
+        'overlaps': [],
+    }
+    t_last = None
+    w = None
+    with open_output(out, compression) as fo:
+        for p in ls:
+            r = {
+                'path': p,
+                'time_start': None,
+                'time_end': None,
+                'n_rows': 0,
+                'n_dropped': 0,
+            }
+            with LidStream(p) as st:
+                if w is None:
+                    rv['logger_type'] = st.glt
+                    w = CsvWriter(fo, st.glt, columns, time_fmt=time_fmt)
+                    w.write_header()
+                elif st.glt != rv['logger_type']:
+                    e = f'lix: cannot merge {st.glt} file {p} into {rv["logger_type"]} ones'
+                    raise ExceptionLixMerge(e)
+                bc = BatchConverter(st.glt, st.epoch, get_calibration(st.header))
+                for d in st.batches(batch_size):
+                    d = bc.convert(d)
+                    t = d['time']
+                    if not len(t):
+                        continue
+                    if r['time_start'] is None:
+                        r['time_start'] = int(t[0])
+                        _flag(rv, p, t_last, int(t[0]), max_gap)
+                    r['time_end'] = int(t[-1])
+                    if overlap == 'drop' and t_last is not None and t[0] <= t_last:
+                        m = t > t_last
+                        r['n_dropped'] += int((~m).sum())
+                        d = {k: v[m] for k, v in d.items()}
+                    n = len(d['time'])
+                    if n:
+                        w.write(d)
+                        t_last = int(d['time'][-1])
+                    r['n_rows'] += n
+            rv['n_rows'] += r['n_rows']
+            rv['files'].append(r)
+    return rv
+
+
+
+def merge_folder(folder, out_dir=None, by='serial', columns='extended',
+                 time_fmt='iso', max_gap=MERGE_MAX_GAP, overlap='drop',
+                 compression=None):
+    # merges LID files in folder, one CSV plus JSON report per logger
+    out_dir = out_dir or folder
+    ls = [os.path.join(folder, f) for f in sorted(os.listdir(folder))
+          if f.endswith('.lid')]
+    rv = {}
+    for k, g in group_lid_files(ls, by).items():
+        out = os.path.join(out_dir, f'{k}_merged.csv')
+        r = merge_lid_files(g, out, columns, time_fmt, max_gap, overlap,
+                            compression=compression)
+        with open(out.replace('.csv', '.json'), 'w') as f:
+            json.dump(r, f, indent=4)
+        rv[k] = r
+    return rv
+
+
+
+def main():
+    ap = argparse.ArgumentParser(description='merge deployments of each logger')
+    ap.add_argument('folder')
+    ap.add_argument('-o', '--out-dir', default=None)
+    ap.add_argument('--by', default='serial', choices=('serial', 'header'),
+                    help='group by serial in file name or by header fields')
+    ap.add_argument('--columns', default='extended',
+                    choices=('compact', 'extended'))
+    ap.add_argument('--max-gap', type=int, default=MERGE_MAX_GAP,
+                    help='seconds between files flagged as a gap')
+    ap.add_argument('--overlap', default='drop', choices=('drop', 'keep'))
+    ap.add_argument('--compression', default=None, choices=list(COMPRESSION))
+    args = ap.parse_args()
+
+    rv = merge_folder(args.folder, args.out_dir, args.by, args.columns,
+                      max_gap=args.max_gap, overlap=args.overlap,
+                      compression=args.compression)
+    for k, r in rv.items():
+        print(f"{r['out']}, {len(r['files'])} files, {r['n_rows']} rows, "
+              f"{len(r['gaps'])} gaps, {len(r['overlaps'])} overlaps")
+    return 0
+
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,66 @@
+import time
+from contextlib import contextmanager
+
+
+
+# read: open and map file, header: macro-header and .lih file,
+# demux: find and decode samples, calibration: to physical units,
+# formatting: to CSV text, write: to disk, stats: deployment statistics
+METRICS_STAGES = ('read', 'header', 'demux', 'calibration', 'formatting',
+                  'write', 'stats')
+
+
+
+class ConversionMetrics:
+    # seconds per stage and counters of one conversion
+    def __init__(self):
+        self.seconds = dict.fromkeys(METRICS_STAGES, 0.0)
+        self.n_samples = 0
+        # t == 0 ones, and CTD ones with v1v2 + v2v1 == 0
+        self.n_skipped = 0
+        self.n_skipped_cv = 0
+        self.n_straddling = 0
+        self.n_bytes = 0
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - t0
+
+    def timed(self, name, it):
+        # iterates it, time spent producing its items goes to stage name
+        it = iter(it)
+        while True:
+            t0 = time.perf_counter()
+            try:
+                v = next(it)
+            except StopIteration:
+                return
+            finally:
+                self.seconds[name] += time.perf_counter() - t0
+            yield v
+
+    @property
+    def total(self):
+        return sum(self.seconds.values())
+
+    def to_dict(self):
+        return {
+            'seconds': dict(self.seconds),
+            'total': self.total,
+            'n_samples': self.n_samples,
+            'n_skipped': self.n_skipped,
+            'n_skipped_cv': self.n_skipped_cv,
+            'n_straddling': self.n_straddling,
+            'n_bytes': self.n_bytes,
+        }
+
+    def __str__(self):
+        # key=value pairs, easy to grep and parse in logs
+        s = ' '.join(f'{k}={v:.4f}' for k, v in self.seconds.items())
+        return (f'{s} total={self.total:.4f} n_samples={self.n_samples} '
+                f'n_skipped={self.n_skipped} n_skipped_cv={self.n_skipped_cv} '
+                f'n_straddling={self.n_straddling} n_bytes={self.n_bytes}')
@@ -0,0 +1,20 @@
+import numpy as np
+
+
+# water detect is directly in mV, 3000 mV is 100%
+WAT_FULL_SCALE_MV = 3000
+
+
+
+def do16_to_float_array(d):
+    # d: array of sign / magnitude words such as 0x8003
+    # f: array of values in hundredths, such as -0.03
+    d = np.asarray(d, dtype=np.uint16)
+    f = (d & 0x7FFF) * 0.01
+    return np.where(d & 0x8000, -f, f)
+
+
+
+def wat_to_percent(wat):
+    # wat: array of water detect mV, truncated to integer % as before
+    return np.trunc((np.asarray(wat) / WAT_FULL_SCALE_MV) * 100)
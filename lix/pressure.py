@@ -1,6 +1,7 @@
 import bisect
 from functools import lru_cache
 
+import numpy as np
 from numpy import array
 
 
@@ -8,6 +9,9 @@ DEFAULT_PRA = 3
 DEFAULT_PRB = 0.0016
 DEFAULT_PRC = 0
 DEFAULT_PRD = 0
+MAX_INT16 = 65535
+# one table per logger calibration, kept process-wide
+MAX_LUT = 64
 
 
 # ------------------------------------------------------
@@ -41,6 +45,16 @@ class Pressure:
 
 
 
+@lru_cache(maxsize=MAX_LUT)
+def pressure_lut(pra, prb):
+    # decibars for every possible 16-bit raw ADC count
+    lcp = LixFileConverterP(pra, prb)
+    lut = lcp.cnv.convert(np.arange(MAX_INT16 + 1, dtype=np.float64))
+    lut.flags.writeable = False
+    return lut
+
+
+
 class LixFileConverterP:
     def __init__(self, a, b):
         # the converter outputs decibars
@@ -49,9 +63,28 @@ class LixFileConverterP:
         self.coefficients['PRA'] = a
         self.coefficients['PRB'] = b
         self.cnv = Pressure(self)
+        self._lut = None
+
+    @property
+    def lut(self):
+        # shared with other converters using the same coefficients
+        if self._lut is None:
+            self._lut = pressure_lut(*self.key())
+        return self._lut
+
+    def key(self):
+        return self.coefficients['PRA'], self.coefficients['PRB']
 
-    @lru_cache
     def convert(self, raw_pressure):
+        # raw_pressure: single value, returned as 1-element array as before
+        if isinstance(raw_pressure, int):
+            return self.lut[raw_pressure:raw_pressure + 1]
+        return self.cnv.convert(raw_pressure)
+
+    def convert_array(self, raw_pressure):
+        # raw ADC counts index the table, compensated ones are not integers
+        if np.issubdtype(raw_pressure.dtype, np.integer):
+            return self.lut[raw_pressure]
         return self.cnv.convert(raw_pressure)
 
 
@@ -59,6 +92,29 @@ class LixFileConverterP:
 
 
 
+# lookup table of raw temperature ADC counts, from -20°C to 50°C
+LUT_PRF = [
+   56765, 56316, 55850, 55369, 54872, 54359,
+   53830, 53285, 52724, 52148, 51557, 50951,
+   50331, 49697, 49048, 48387, 47714, 47028,
+   46331, 45623, 44906, 44179, 43445, 42703,
+   41954, 41199, 40440, 39676, 38909, 38140,
+   37370, 36599, 35828, 35059, 34292, 33528,
+   32768, 32012, 31261, 30517, 29780, 29049,
+   28327, 27614, 26909, 26214, 25530, 24856,
+   24192, 23541, 22900, 22272, 21655, 21051,
+   20459, 19880, 19313, 18759, 18218, 17689,
+   17174, 16670, 16180, 15702, 15236, 14782,
+   14341, 13912, 13494, 13088, 12693
+]
+LUT_PRF_MIN_T = -20
+
+# bisect needs a sorted list, so built once here
+_LUT_PRF_SORTED = sorted(LUT_PRF)
+_LUT_PRF_SORTED_NP = np.array(_LUT_PRF_SORTED, dtype=np.int64)
+
+
+
 def prf_compensate_pressure(rp, rt, prc, prd):
     # rp: raw Pressure ADC counts
     # rt: raw Temperature ADC counts
@@ -66,31 +122,13 @@ def prf_compensate_pressure(rp, rt, prc, prd):
     # prd: reference temperature for pressure sensor = °C
     # cp: corrected Pressure ADC counts
     # ct: closest Temperature = °C
-
-    # define lookup table, from -20°C to 50°C
-    lut = [
-       56765, 56316, 55850, 55369, 54872, 54359,
-       53830, 53285, 52724, 52148, 51557, 50951,
-       50331, 49697, 49048, 48387, 47714, 47028,
-       46331, 45623, 44906, 44179, 43445, 42703,
-       41954, 41199, 40440, 39676, 38909, 38140,
-       37370, 36599, 35828, 35059, 34292, 33528,
-       32768, 32012, 31261, 30517, 29780, 29049,
-       28327, 27614, 26909, 26214, 25530, 24856,
-       24192, 23541, 22900, 22272, 21655, 21051,
-       20459, 19880, 19313, 18759, 18218, 17689,
-       17174, 16670, 16180, 15702, 15236, 14782,
-       14341, 13912, 13494, 13088, 12693
-    ]
-
-    # bisect needs a sorted list
-    lut.reverse()
+    lut = _LUT_PRF_SORTED
 
     # use vt to look up the closest temperature in degrees C, indexed T, i_t
     i_t = len(lut) - bisect.bisect(lut, rt)
 
     # use index of closest value (i_m) to get the T in °C, aka ct
-    ct = i_t - 20
+    ct = i_t + LUT_PRF_MIN_T
 
     # corrected pressure ADC counts
     cp = rp - (prc * (ct - prd))
@@ -106,3 +144,12 @@ def prf_compensate_pressure(rp, rt, prc, prd):
 
 
     return cp
+
+
+
+def prf_compensate_pressure_array(rp, rt, prc, prd):
+    # same as prf_compensate_pressure() but for whole columns of rp, rt
+    lut = _LUT_PRF_SORTED_NP
+    i_t = len(lut) - np.searchsorted(lut, np.asarray(rt), side='right')
+    ct = i_t + LUT_PRF_MIN_T
+    return np.asarray(rp, dtype=np.float64) - (prc * (ct - prd))
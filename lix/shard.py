@@ -0,0 +1,157 @@
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from lix.compress import COMPRESSION, compressed_path, open_output
+from lix.convert import BatchConverter
+from lix.csv_writer import CsvWriter
+from lix.derived import latitude
+from lix.engine import CS, LEN_PAYLOAD, dox_chunks_per_batch, DT_DO1, DT_DO2
+from lix.header import get_calibration
+from lix.index import checkpoints
+from lix.metrics import ConversionMetrics
+from lix.stats import DeploymentStats
+from lix.stream import LidStream, BATCH_SIZE
+
+
+
+# files smaller than this many chunks per shard are not worth splitting
+SHARD_MIN_CHUNKS = 256
+SHARD_SUFFIX = '.shard'
+
+
+
+def shard_plan(st, n_shards, batch_size=BATCH_SIZE):
+    # st: LidStream, returns list of (start, stop) for batches(), about
+    # the same data bytes each, TDO / CTD ones come from a pass over the
+    # masks only, DOX ones begin a group of chunks so need no pass at all
+    n_chunks = math.ceil(st.data_size / CS)
+    n_shards = max(1, min(n_shards, n_chunks // SHARD_MIN_CHUNKS))
+    per = math.ceil(n_chunks / n_shards)
+
+    if st.glt.startswith('DO'):
+        sl = DT_DO2.itemsize if st.glt == 'DO2' else DT_DO1.itemsize
+        g = dox_chunks_per_batch(st.glt)
+        per = math.ceil(per / g) * g
+        starts = []
+        for c0 in range(0, n_chunks, per):
+            nm = c0 * LEN_PAYLOAD // sl
+            starts.append((c0 * LEN_PAYLOAD, nm, nm * st.spt))
+    else:
+        starts = [tuple(c) for c in checkpoints(st, per, batch_size)]
+
+    stops = [s[1] for s in starts[1:]] + [None]
+    return list(zip(starts, stops))
+
+
+
+def _convert_shard(p, start, stop, out, columns, precision, time_fmt,
+                   compression, batch_size, derived):
+    # runs in a worker process, writes CSV rows of one shard, no titles
+    # returns its metrics and statistics
+    mt = ConversionMetrics()
+    with LidStream(p) as st:
+        s = DeploymentStats(st.glt, derived)
+        bc = BatchConverter(st.glt, st.epoch, get_calibration(st.header),
+                            derived, latitude(p))
+        with open_output(out, compression) as fo:
+            w = CsvWriter(fo, st.glt, columns, precision, time_fmt, derived)
+            for d in mt.timed('demux', st.batches(batch_size, start, stop)):
+                with mt.stage('calibration'):
+                    d = bc.convert(d)
+                with mt.stage('stats'):
+                    s.add(d)
+                with mt.stage('formatting'):
+                    b = w.format(d)
+                with mt.stage('write'):
+                    fo.write(b)
+        mt.n_samples = max(st.n_samples - start[1], 0)
+        mt.n_skipped = st.n_skipped
+        mt.n_skipped_cv = bc.n_skipped_cv
+        mt.n_straddling = st.n_straddling
+    return mt.to_dict(), s
+
+
+
+def convert_shards(p, out, columns='extended', precision=None,
+                   time_fmt='iso', compression=None, n_workers=None,
+                   batch_size=BATCH_SIZE, metrics=None, derived=None,
+                   stats=None):
+    # appends CSV rows of LID file p to out, which has titles already,
+    # each shard converted by a worker, outputs stitched in shard order,
+    # compressed shards are stitched as they are, gzip, bz2 and xz all
+    # allow concatenated streams
+    # metrics: ConversionMetrics, stage seconds are summed over workers
+    # derived: derived channels to add, see derived.py
+    # stats: DeploymentStats the ones of every shard are merged into
+    n_workers = n_workers or os.cpu_count() or 1
+    mt = metrics or ConversionMetrics()
+    with mt.stage('demux'):
+        with LidStream(p) as st:
+            plan = shard_plan(st, n_workers, batch_size)
+
+    # out already has its compression extension, the shards get theirs
+    bases = [f'{out}{SHARD_SUFFIX}{i}' for i in range(len(plan))]
+    parts = [compressed_path(o, compression) for o in bases]
+    try:
+        with ProcessPoolExecutor(max_workers=min(n_workers, len(plan))) as ex:
+            fut = [ex.submit(_convert_shard, p, start, stop, o, columns,
+                             precision, time_fmt, compression, batch_size,
+                             derived)
+                   for (start, stop), o in zip(plan, bases)]
+            ls = [f.result() for f in fut]
+
+        t0 = time.perf_counter()
+        with open(out, 'ab') as fo:
+            for o in parts:
+                with open(o, 'rb') as f:
+                    while b := f.read(1 << 20):
+                        fo.write(b)
+        mt.seconds['write'] += time.perf_counter() - t0
+    finally:
+        for o in parts:
+            if os.path.exists(o):
+                os.remove(o)
+
+    for r, s in ls:
+        if stats:
+            stats.merge(s)
+        for k, v in r['seconds'].items():
+            mt.seconds[k] += v
+        mt.n_samples += r['n_samples']
+        mt.n_skipped += r['n_skipped']
+        mt.n_skipped_cv += r['n_skipped_cv']
+        mt.n_straddling += r['n_straddling']
+    return {
+        'n_shards': len(plan),
+        'n_samples': mt.n_samples,
+        'n_skipped': mt.n_skipped,
+        'n_skipped_cv': mt.n_skipped_cv,
+    }
+
+
+
+def main():
+    ap = argparse.ArgumentParser(description='convert one LID file on all cores')
+    ap.add_argument('paths', nargs='+', help='.lid files')
+    ap.add_argument('-j', '--workers', type=int, default=None,
+                    help='number of processes, default one per core')
+    ap.add_argument('--compression', default=None, choices=list(COMPRESSION))
+    args = ap.parse_args()
+
+    # imported here, lix.lix imports this module
+    from lix.lix import LidParser
+    for p in args.paths:
+        lp = LidParser()
+        t0 = time.perf_counter()
+        rv = lp.parse(p, 'parallel', compression=args.compression,
+                      n_workers=args.workers)
+        print(f'{p}, {lp.n_samples} samples, '
+              f'{time.perf_counter() - t0:.3f} s{", error" if rv else ""}')
+    return 0
+
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
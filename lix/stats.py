@@ -0,0 +1,138 @@
+import json
+import math
+import os
+import numpy as np
+from lix.utils import time_to_iso8601
+
+
+
+# channels summarized per logger type, derived ones enabled are added
+STATS_COLUMNS = {
+    'TDO': ['vt', 'cpd', 'ax', 'ay', 'az'],
+    'CTD': ['vt', 'cpd', 'ax', 'ay', 'az', 'con', 'sal'],
+    'DO1': ['dos', 'dop', 'dot'],
+    'DO2': ['dos', 'dop', 'dot', 'wat'],
+}
+STATS_SUFFIX = '_stats.json'
+
+
+
+def stats_path(p):
+    return p.replace('.lid', STATS_SUFFIX)
+
+
+
+class DeploymentStats:
+    # whole-file statistics updated batch by batch while converting,
+    # NaN values, i.e. salinity out of range, do not count
+    def __init__(self, glt, derived=None):
+        self.glt = glt
+        self.columns = STATS_COLUMNS[glt] + list(derived or [])
+        self.n_rows = 0
+        self.time_first = None
+        self.time_last = None
+        self.mins = dict.fromkeys(self.columns, math.nan)
+        self.maxs = dict.fromkeys(self.columns, math.nan)
+        self.sums = dict.fromkeys(self.columns, 0.0)
+        self.counts = dict.fromkeys(self.columns, 0)
+
+    def add(self, d):
+        # d: converted batch, see BatchConverter
+        t = d['time']
+        if not len(t):
+            return
+        self.n_rows += len(t)
+        if self.time_first is None:
+            self.time_first = int(t[0])
+        self.time_last = int(t[-1])
+        for k in self.columns:
+            v = d[k].astype(np.float64)
+            v = v[~np.isnan(v)]
+            if not len(v):
+                continue
+            self.mins[k] = float(np.fmin(self.mins[k], v.min()))
+            self.maxs[k] = float(np.fmax(self.maxs[k], v.max()))
+            self.sums[k] += float(v.sum())
+            self.counts[k] += len(v)
+
+    def add_sample(self, t, v):
+        # t: sample time, v: {column: value} of one sample, this is what
+        # the per-sample engine uses, add() is for whole batches
+        self.n_rows += 1
+        if self.time_first is None:
+            self.time_first = t
+        self.time_last = t
+        for k in self.columns:
+            x = float(v[k])
+            if math.isnan(x):
+                continue
+            self.mins[k] = x if math.isnan(self.mins[k]) else min(self.mins[k], x)
+            self.maxs[k] = x if math.isnan(self.maxs[k]) else max(self.maxs[k], x)
+            self.sums[k] += x
+            self.counts[k] += 1
+
+    def merge(self, o):
+        # o: DeploymentStats of the part of the file right after this one
+        self.n_rows += o.n_rows
+        if self.time_first is None:
+            self.time_first = o.time_first
+        if o.time_last is not None:
+            self.time_last = o.time_last
+        for k in self.columns:
+            self.mins[k] = float(np.fmin(self.mins[k], o.mins[k]))
+            self.maxs[k] = float(np.fmax(self.maxs[k], o.maxs[k]))
+            self.sums[k] += o.sums[k]
+            self.counts[k] += o.counts[k]
+
+    def to_dict(self, mt=None):
+        # mt: ConversionMetrics of the conversion, for its counters
+        def _v(x):
+            return None if math.isnan(x) else x
+
+        def _t(x):
+            return None if x is None else time_to_iso8601(x)
+
+        return {
+            'logger_type': self.glt,
+            'n_samples': mt.n_samples if mt else self.n_rows,
+            'n_rows': self.n_rows,
+            'n_skipped': mt.n_skipped if mt else 0,
+            'n_skipped_cv': mt.n_skipped_cv if mt else 0,
+            'time_first': _t(self.time_first),
+            'time_last': _t(self.time_last),
+            'columns': {
+                k: {
+                    'n': self.counts[k],
+                    'min': _v(self.mins[k]),
+                    'mean': self.sums[k] / self.counts[k] if self.counts[k] else None,
+                    'max': _v(self.maxs[k]),
+                }
+                for k in self.columns
+            },
+        }
+
+
+
+def write_stats(p, s):
+    # p: LID file, s: DeploymentStats.to_dict(), appended to its .lih file
+    # and saved as JSON next to it, returns the JSON path
+    path_lih = p.replace('.lid', '.lih')
+    if os.path.exists(path_lih):
+        with open(path_lih, 'a') as f:
+            f.write('\nstatistics\n')
+            f.write(f"\tsamples = {s['n_samples']}\n")
+            f.write(f"\trows = {s['n_rows']}\n")
+            f.write(f"\tskipped = {s['n_skipped']}\n")
+            if s['logger_type'] == 'CTD':
+                f.write(f"\tskipped v1v2 + v2v1 == 0 = {s['n_skipped_cv']}\n")
+            f.write(f"\tfirst time = {s['time_first']}\n")
+            f.write(f"\tlast time = {s['time_last']}\n")
+            for k, c in s['columns'].items():
+                v = [f'{c[x]:.3f}' if c[x] is not None else 'n/a'
+                     for x in ('min', 'mean', 'max')]
+                f.write(f"\t{k} min / mean / max = {' / '.join(v)}\n")
+
+    path_json = stats_path(p)
+    with open(path_json, 'w') as f:
+        json.dump(s, f, indent=4)
+    return path_json
@@ -0,0 +1,176 @@
+import mmap
+import os
+import numpy as np
+from lix.engine import (
+    CS,
+    scan_masks,
+    decode_samples,
+    decode_dox,
+    count_dox,
+    count_straddling,
+    dox_chunks_per_batch,
+    DT_TDO,
+    DT_CTD,
+    DT_DO1,
+    DT_DO2,
+    LEN_PAYLOAD,
+)
+from lix.header import parse_header
+
+
+
+# samples per batch, memory use depends on this, not on file size
+BATCH_SIZE = 65536
+
+
+
+def _open_source(src):
+    # src: path, bytes-like object or binary file object
+    # returns LID bytes and if they are a memory map we must close
+    if isinstance(src, (str, os.PathLike)):
+        with open(src, 'rb') as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), True
+    if isinstance(src, (bytes, bytearray, memoryview)):
+        return src, False
+    if hasattr(src, 'read'):
+        return src.read(), False
+    raise TypeError(f'lix: cannot read LID data from {type(src).__name__}')
+
+
+
+class LidStream:
+    # memory-maps a LID file and yields its decoded samples in batches,
+    # so memory use stays the same whatever the file size
+    def __init__(self, p):
+        # p: path, also bytes or file object, see _open_source()
+        self.p = p
+        self.mm, self._own_mm = _open_source(p)
+        bb = self.mm
+        self.raw_file_size = len(bb)
+        self.n_pad = bb[-253]
+        # same size as slicing bb[CS:-n_pad], without copying it
+        self.data_size = len(range(self.raw_file_size)[CS:-self.n_pad])
+        self.header = parse_header(bb[:CS])
+        self.glt = self.header.logger_type
+        self.file_version = self.header.file_version
+        self.epoch = self.header.epoch
+        self.spt = self.header.spt
+        # filled while iterating
+        self.n_samples = 0
+        self.n_skipped = 0
+        self.n_straddling = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self._own_mm:
+            self.mm.close()
+
+    def _data(self):
+        return memoryview(self.mm)[CS:]
+
+    def batches(self, batch_size=BATCH_SIZE, start=(0, 0, 0), stop=None):
+        # yields dictionaries of columns, raw sensor words plus
+        # et: elapsed time, ct: cumulative time, both in seconds
+        # start: (payload position, samples, cumulative time) to resume at,
+        # see index.py, DOX ones must begin a group of chunks
+        # stop: number of samples, skipped ones too, to end before, see shard.py
+        if self.glt in ('TDO', 'CTD'):
+            yield from self._batches_tdo_ctd(batch_size, *start, stop=stop)
+        elif self.glt.startswith('DO'):
+            yield from self._batches_dox(batch_size, *start, stop=stop)
+
+    def count(self, batch_size=BATCH_SIZE):
+        # walks the masks without decoding any sample
+        # returns number of samples, skipped ones, cumulative time of first
+        # and last samples, None when there are no samples
+        if self.glt.startswith('DO'):
+            self.n_samples = count_dox(self.data_size, self.glt)
+            ct1 = (self.n_samples - 1) * self.spt if self.n_samples else None
+            ct0 = 0 if self.n_samples else None
+            return self.n_samples, 0, ct0, ct1
+
+        sl = DT_CTD.itemsize if self.glt == 'CTD' else DT_TDO.itemsize
+        p = 0
+        nm = 0
+        ct = 0
+        ct0 = None
+        done = False
+        self.n_skipped = 0
+        while not done:
+            mv = self._data()
+            _, ls_t, ls_skip, nm, p, done = scan_masks(
+                mv, self.data_size, sl, p, nm, batch_size)
+            mv.release()
+            et = ls_t[~ls_skip]
+            if len(et) and ct0 is None:
+                ct0 = ct + int(et[0])
+            ct += int(et.sum(dtype=np.int64))
+            self.n_skipped += int(ls_skip.sum())
+        self.n_samples = nm
+        return nm, self.n_skipped, ct0, ct if ct0 is not None else None
+
+    def _batches_tdo_ctd(self, batch_size, p=0, nm=0, ct=0, stop=None):
+        sl = DT_CTD.itemsize if self.glt == 'CTD' else DT_TDO.itemsize
+        done = False
+        while not done:
+            n = batch_size if stop is None else min(batch_size, stop - nm)
+            if n <= 0:
+                break
+            mv = self._data()
+            p0 = p
+            ls_p, ls_t, ls_skip, nm, p, done = scan_masks(
+                mv, self.data_size, sl, p, nm, n)
+            if len(ls_p):
+                starts = np.concatenate(([p0], ls_p[:-1] + sl))
+                self.n_straddling += count_straddling(starts, ls_p + sl)
+            ok = ~ls_skip
+            a = decode_samples(mv, self.data_size, self.glt, ls_p[ok])
+            mv.release()
+            et = ls_t[ok].astype(np.int64)
+            cts = ct + np.cumsum(et)
+            if len(cts):
+                ct = int(cts[-1])
+            self.n_samples = nm
+            self.n_skipped += int(ls_skip.sum())
+            d = {'et': et, 'ct': cts}
+            for k in a.dtype.names:
+                d[k] = a[k]
+            if len(et):
+                yield d
+
+    def _batches_dox(self, batch_size, p=0, nm=0, ct=0, stop=None):
+        # whole groups of chunks, so no DO1 sample is cut between batches
+        sl = DT_DO2.itemsize if self.glt == 'DO2' else DT_DO1.itemsize
+        g = dox_chunks_per_batch(self.glt)
+        n_chunks = max(1, batch_size * sl // LEN_PAYLOAD // g) * g
+        c0 = p // LEN_PAYLOAD
+        k0 = nm
+        while c0 * CS < self.data_size:
+            mv = self._data()
+            a = decode_dox(mv, self.data_size, self.glt, c0, c0 + n_chunks)
+            mv.release()
+            if stop is not None:
+                a = a[:max(stop - k0, 0)]
+            if not len(a):
+                break
+            k = k0 + np.arange(len(a), dtype=np.int64)
+            ct = k * self.spt
+            self.n_straddling += count_straddling(k * sl, (k + 1) * sl)
+            d = {'ct': ct}
+            for k in a.dtype.names:
+                d[k] = a[k]
+            k0 += len(a)
+            self.n_samples = k0
+            c0 += n_chunks
+            yield d
+
+
+
+def iter_lid_batches(p, batch_size=BATCH_SIZE):
+    with LidStream(p) as st:
+        yield from st.batches(batch_size)
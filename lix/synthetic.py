@@ -0,0 +1,214 @@
+import datetime
+import numpy as np
+from lix.ascii85 import num_to_ascii85 as n2a
+from lix.engine import (
+    CS,
+    LEN_MINI_HEADER,
+    LEN_PAYLOAD,
+    MASK_TIME_EXTENDED,
+    DT_TDO,
+    DT_CTD,
+    DT_DO1,
+    DT_DO2,
+    count_dox,
+)
+from lix.header import (
+    I_CC_AREA,
+    LEN_LIX_FILE_CC_AREA,
+    LEN_LIX_FILE_CONTEXT,
+    LEN_LIX_FILE_CONTEXT_V3,
+    CC_AREA_TAG,
+)
+
+
+
+# writes LID files that look like the ones loggers download, used to
+# measure conversions, see bench.py, values are random but realistic
+SYNTHETIC_CAL = {
+    'tmr': 10000.0,
+    'tma': 1.1238e-3,
+    'tmb': 2.35e-4,
+    'tmc': 8.5e-8,
+    'tmd': 0.0,
+    'pra': 3.0,
+    'prb': 0.0016,
+    'prc': 1.5,
+    'prd': 20.0,
+    'dco': 1.0,
+    'nco': 1.0,
+    'dhu': 1.0,
+    'dcd': 1.0,
+}
+SYNTHETIC_CQ = (0.5, 1.5, 0.1)
+# fraction of samples with 2-byte masks, and of skipped ones, t == 0
+RATE_EXTENDED = 0.01
+RATE_SKIPPED = 0.002
+LEN_END_MARKER = 2
+
+
+
+def _bcd(v):
+    return ((v // 10) << 4) | (v % 10)
+
+
+
+def synthetic_header(glt, file_version, dt=None, spt=1, gfv='4.00'):
+    # returns CS bytes of macro-header
+    # dt: datetime of the first sample, spt: sample period in seconds
+    dt = dt or datetime.datetime(2024, 3, 15, 12, 30, 0)
+    h = bytearray(CS)
+    h[0:3] = glt.encode()
+    h[3] = file_version
+    h[4:10] = bytes(_bcd(v) for v in (dt.year % 100, dt.month, dt.day,
+                                      dt.hour, dt.minute, dt.second))
+    h[10:12] = (2000).to_bytes(2, 'big')
+    h[12] = 1
+
+    # CC area, all ascii85 but PRC / PRD which are hundredths
+    cc = bytearray(b'0' * LEN_LIX_FILE_CC_AREA)
+    cc[:5] = CC_AREA_TAG
+    pos = {'tmr': 10, 'tma': 15, 'tmb': 20, 'tmc': 25, 'tmd': 30,
+           'pra': 125, 'prb': 130, 'prc': 135, 'prd': 140, 'dco': 145,
+           'nco': 150, 'dhu': 155, 'dcd': 160}
+    for k, i in pos.items():
+        v = SYNTHETIC_CAL[k]
+        s = f'{int(round(v * 100)):05d}' if k in ('prc', 'prd') else n2a(v)
+        cc[i:i + 5] = s.encode()
+    if glt in ('TDO', 'CTD'):
+        h[I_CC_AREA:I_CC_AREA + LEN_LIX_FILE_CC_AREA] = cc
+    if glt == 'CTD' and file_version >= 3:
+        i = I_CC_AREA + LEN_LIX_FILE_CC_AREA
+        h[i:i + 15] = ''.join(n2a(v) for v in SYNTHETIC_CQ).encode()
+
+    # context area, DOX ones have SPT one byte further
+    if file_version == 2:
+        i = CS - LEN_LIX_FILE_CONTEXT
+    else:
+        i = CS - LEN_LIX_FILE_CONTEXT_V3
+    h[i:i + 4] = gfv.encode()
+    h[i + 4:i + 7] = bytes([1, 0, 1])
+    i += 7
+    if glt.startswith('DO'):
+        i += 1
+    for s in (f'{spt:05d}', '00010', '00020', '00', '00030', '00040'):
+        h[i:i + len(s)] = s.encode()
+        i += len(s)
+    return bytes(h)
+
+
+
+def _random_walk(rnd, n, lo, hi, step):
+    v = np.cumsum(rnd.normal(0, step, n)) + (lo + hi) / 2
+    # fold back into range so it stays realistic
+    r = hi - lo
+    v = np.abs((v - lo) % (2 * r) - r)
+    return (hi - v).astype(np.int64)
+
+
+
+def synthetic_samples(glt, n, rnd, spt=1, rate_extended=RATE_EXTENDED):
+    # returns structured array of n raw samples and their elapsed times
+    # rate_extended: fraction of samples with 2-byte masks
+    dt = {'TDO': DT_TDO, 'CTD': DT_CTD, 'DO1': DT_DO1, 'DO2': DT_DO2}[glt]
+    a = np.zeros(n, dtype=dt)
+    if glt in ('TDO', 'CTD'):
+        a['rt'] = _random_walk(rnd, n, 20000, 45000, 20)
+        a['rp'] = _random_walk(rnd, n, 2000, 60000, 50)
+        for k in ('ax', 'ay', 'az'):
+            a[k] = rnd.integers(-1024, 1024, n)
+    if glt == 'CTD':
+        for k in ('c2c1', 'c1c2', 'v1v2', 'v2v1'):
+            a[k] = _random_walk(rnd, n, 500, 3000, 5)
+        # a few of them with no voltage, they are dropped on conversion
+        z = rnd.random(n) < 0.001
+        a['v1v2'][z] = 0
+        a['v2v1'][z] = 0
+    if glt.startswith('DO'):
+        # hundredths, sign and magnitude, see do16_to_float(), temperature
+        # goes below zero now and then so negative words get tested too
+        a['dos'] = rnd.integers(0, 2000, n)
+        a['dop'] = rnd.integers(0, 15000, n)
+        dot = rnd.integers(0, 3000, n)
+        neg = rnd.random(n) < 0.05
+        a['dot'] = np.where(neg, 0x8000 | (dot // 10), dot)
+    if glt == 'DO2':
+        a['wat'] = rnd.integers(0, 3000, n)
+
+    # elapsed times, mostly sample period, some long and some skipped
+    et = np.full(n, spt, dtype=np.int64)
+    x = rnd.random(n)
+    et[x < rate_extended] = rnd.integers(64, 0x3FFF, (x < rate_extended).sum())
+    et[(x >= rate_extended) & (x < rate_extended + RATE_SKIPPED)] = 0
+    if n:
+        et[0] = max(et[0], 1)
+    return a, et
+
+
+
+def _payload(glt, a, et):
+    # samples back to back, each one after its mask
+    if glt.startswith('DO'):
+        return a.tobytes()
+    lm = np.where(et >= MASK_TIME_EXTENDED, 2, 1)
+    sl = a.dtype.itemsize
+    start = np.concatenate(([0], np.cumsum(lm + sl)[:-1]))
+    out = np.zeros(int(start[-1] + lm[-1] + sl) if len(a) else 0, dtype=np.uint8)
+    e = lm == 2
+    out[start[~e]] = et[~e]
+    out[start[e]] = MASK_TIME_EXTENDED | (et[e] >> 8)
+    out[start[e] + 1] = et[e] & 0xFF
+    b = a.view(np.uint8).reshape(-1, sl)
+    idx = (start + lm)[:, None] + np.arange(sl)
+    out[idx] = b
+    return out.tobytes()
+
+
+
+def _data_size(n_payload):
+    # data section size as parsers see it, padding not included
+    n_chunks = n_payload // LEN_PAYLOAD + 1
+    return n_chunks * CS - (n_chunks * LEN_PAYLOAD - n_payload)
+
+
+
+def _len_end_marker(glt, n_payload, n):
+    # DOX end test is on the position before mini-headers, so the marker
+    # length which gets exactly n samples depends on where the data ends,
+    # when data ends right at a chunk end parsers see one more, all zeros
+    if glt.startswith('DO'):
+        for e in range(LEN_PAYLOAD):
+            if count_dox(_data_size(n_payload + e), glt) == n:
+                return e
+    return LEN_END_MARKER
+
+
+
+def synthetic_lid(glt, file_version, n, seed=0, spt=1, dt=None,
+                  rate_extended=RATE_EXTENDED):
+    # returns bytes of a LID file with n samples, for TDO / CTD ones
+    # spt is the usual time between samples, for DOX ones the only one
+    rnd = np.random.default_rng(seed)
+    a, et = synthetic_samples(glt, n, rnd, spt, rate_extended)
+    # parsers stop when less than a sample plus a mask is left, so an
+    # end marker goes after the last sample, or it would not be decoded
+    pl = _payload(glt, a, et)
+    pl += bytes(_len_end_marker(glt, len(pl), n))
+
+    # data chunks, each one mini-header plus payload, last one padded
+    n_chunks = len(pl) // LEN_PAYLOAD + 1
+    n_pad = n_chunks * LEN_PAYLOAD - len(pl)
+    pl += b'\xff' * n_pad
+    c = np.zeros((n_chunks, CS), dtype=np.uint8)
+    c[:, LEN_MINI_HEADER:] = np.frombuffer(pl, dtype=np.uint8).reshape(-1, LEN_PAYLOAD)
+    # number of padding bytes, read as bb[-253]
+    c[-1, 3] = n_pad
+    return synthetic_header(glt, file_version, dt, spt) + c.tobytes()
+
+
+
+def write_synthetic_lid(p, glt, file_version, n, seed=0, spt=1,
+                        rate_extended=RATE_EXTENDED):
+    with open(p, 'wb') as f:
+        f.write(synthetic_lid(glt, file_version, n, seed, spt,
+                              rate_extended=rate_extended))
+    return p
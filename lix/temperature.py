@@ -1,9 +1,12 @@
 from functools import lru_cache
+import numpy as np
 from numpy import log
 
 
 ZERO_KELVIN = -273.15
 MAX_INT16 = 65535
+# one table per logger calibration, kept process-wide
+MAX_LUT = 64
 
 
 class Temperature:
@@ -18,16 +21,31 @@ class Temperature:
         self.tmr = coefficients['TMR']
 
     def convert(self, raw_temperature):
+        # works for single values and numpy arrays alike
         try:
             temp = (raw_temperature * self.tmr) / (MAX_INT16 - raw_temperature)
+            lt = log(temp)
             return 1 / (self.tma +
-                        self.tmb * log(temp) + self.tmd*(log(temp))**2 +
-                        self.tmc * (log(temp)) ** 3) + ZERO_KELVIN
+                        self.tmb * lt + self.tmd * lt ** 2 +
+                        self.tmc * lt ** 3) + ZERO_KELVIN
         except ZeroDivisionError:
             return ZERO_KELVIN
 
 
 
+@lru_cache(maxsize=MAX_LUT)
+def temperature_lut(tma, tmb, tmc, tmd, tmr):
+    # Celsius for every possible 16-bit raw ADC count
+    lct = LixFileConverterT(tma, tmb, tmc, tmd, tmr)
+    raw = np.arange(MAX_INT16 + 1, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lut = lct.cnv.convert(raw)
+    lut[MAX_INT16] = ZERO_KELVIN
+    lut.flags.writeable = False
+    return lut
+
+
+
 class LixFileConverterT:
     def __init__(self, a, b, c, d, r):
         self.coefficients = dict()
@@ -37,10 +55,25 @@ class LixFileConverterT:
         self.coefficients['TMD'] = d
         self.coefficients['TMR'] = r
         self.cnv = Temperature(self)
+        self._lut = None
+
+    @property
+    def lut(self):
+        # shared with other converters using the same coefficients
+        if self._lut is None:
+            self._lut = temperature_lut(*self.key())
+        return self._lut
+
+    def key(self):
+        c = self.coefficients
+        return c['TMA'], c['TMB'], c['TMC'], c['TMD'], c['TMR']
 
-    @lru_cache
     def convert(self, raw_temperature):
-        # _p(f'\nLixFileConverterT coefficients {self.coefficients}')
-        # _p(f'raw T {raw_temperature} converted T {self.cnv.convert(raw_temperature)}')
+        # raw_temperature: 16-bit ADC counts, single value or numpy array,
+        # only integer ones index the table, others use the formula
+        if isinstance(raw_temperature, (int, np.integer)):
+            return self.lut[raw_temperature]
+        if (isinstance(raw_temperature, np.ndarray) and
+                np.issubdtype(raw_temperature.dtype, np.integer)):
+            return self.lut[raw_temperature]
         return self.cnv.convert(raw_temperature)
-
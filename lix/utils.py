@@ -1,3 +1,10 @@
+import datetime
+import re
+import numpy as np
+from dateutil.tz import tzlocal, tzutc
+
+
+
 def scale_battery(mv_vd, glt) -> int:
     # mv_vd: millivolts from voltage divider
     v = mv_vd
@@ -10,3 +17,71 @@ def scale_battery(mv_vd, glt) -> int:
 
     # these are real mV
     return int(v)
+
+
+
+def _time_mah_str_to_seconds(s: str) -> int:
+    # s: '231103190012' embedded in macro_header
+    dt = datetime.datetime.strptime(s, "%y%m%d%H%M%S")
+    # set dt as UTC since objects are 'naive' by default
+    dt_utc = dt.replace(tzinfo=tzutc())
+    dt_utc.astimezone(tzlocal())
+    rv = dt_utc.timestamp()
+    # rv: 1699038012
+    return int(rv)
+
+
+
+def _time_bytes_to_str(b: bytes) -> str:
+    # b: b'\x24\x01\x31\x12\x34\x56'
+    s = ''
+    for v in b:
+        high = (v & 0xf0) >> 4
+        low = (v & 0x0f) >> 0
+        s += f'{high}{low}'
+    # s: '240131123456'
+    return s
+
+
+
+def time_to_iso8601(ts) -> str:
+    # ts: 1699038012, seconds since 1970, UTC
+    # returns: '2023-11-03T19:00:12.000Z'
+    dt = datetime.datetime.fromtimestamp(ts, datetime.timezone.utc)
+    return dt.replace(tzinfo=None).isoformat() + '.000Z'
+
+
+
+def time_to_iso8601_array(ts):
+    # same as time_to_iso8601() for a whole array of seconds at once
+    t = np.asarray(ts, dtype=np.int64).astype('datetime64[s]')
+    return np.char.add(np.datetime_as_string(t, unit='s'), '.000Z')
+
+
+
+def time_to_epoch(t):
+    # t: seconds since 1970, or ISO 8601 string, UTC when no zone given
+    if t is None or isinstance(t, (int, float)):
+        return t
+    dt = datetime.datetime.fromisoformat(t)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return int(dt.timestamp())
+
+
+
+# numbers in .gps files, i.e. 'lat 41.52' or '-70.67 W'
+_RE_NUMBER = re.compile(r'[-+]?\d+\.?\d*')
+
+
+
+def read_gps(p):
+    # p: .gps file next to the LID one, latitude and longitude lines
+    # returns (lat, lon), Nones when missing or not understood
+    try:
+        with open(p, 'r') as f:
+            s = f.read().split('\n')
+        v = _RE_NUMBER.findall(' '.join(s[:2]))
+        return float(v[0]), float(v[1])
+    except (Exception, ):
+        return None, None
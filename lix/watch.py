@@ -0,0 +1,192 @@
+import argparse
+import asyncio
+import glob
+import inspect
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from lix.batch import _convert_one, _result
+from lix.utils import read_gps
+
+
+
+# seconds between polls, a LID file is complete when its size and mtime
+# stay the same these many polls, then we give its .gps file some time
+WATCH_PERIOD = 1.0
+WATCH_N_STABLE = 2
+WATCH_GPS_WAIT = 5.0
+# completion events kept for consumers awaiting them, oldest dropped
+WATCH_MAX_EVENTS = 1000
+
+
+log = logging.getLogger(__name__)
+
+
+
+class WatchService:
+    # converts LID files as soon as they are completely downloaded
+    def __init__(self, folders, callback=None, n_workers=None,
+                 engine='numpy', fmt='csv', cache=True, period=WATCH_PERIOD,
+                 n_stable=WATCH_N_STABLE, gps_wait=WATCH_GPS_WAIT):
+        # callback: function or coroutine called with every completion event
+        # n_workers: conversions at the same time, None means one per core
+        # cache: skip files whose outputs are current, i.e. after a restart
+        self.folders = folders
+        self.callback = callback
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.engine = engine
+        self.fmt = fmt
+        self.cache = cache
+        self.period = period
+        self.n_stable = n_stable
+        self.gps_wait = gps_wait
+        # completion events, only without callback, for consumers
+        # preferring to await them
+        self.events = None if callback else asyncio.Queue(WATCH_MAX_EVENTS)
+        # path: (size, mtime_ns), polls seen like that, time it got stable
+        self._seen = {}
+        # path: (size, mtime_ns) when converted
+        self._done = {}
+        self._busy = set()
+        self._tasks = set()
+        self._stop = asyncio.Event()
+        # process pool, a new one after a worker dies, see _convert()
+        self._ex = None
+
+    def _ready(self):
+        # returns LID files complete since last poll
+        rv = []
+        now = time.monotonic()
+        for folder in self.folders:
+            for p in glob.glob(os.path.join(folder, '*.lid')):
+                try:
+                    s = os.stat(p)
+                except FileNotFoundError:
+                    continue
+                k = (s.st_size, s.st_mtime_ns)
+                if p in self._busy or self._done.get(p) == k:
+                    continue
+                prev = self._seen.get(p)
+                n = prev[1] + 1 if prev and prev[0] == k else 1
+                t = prev[2] if prev and prev[0] == k else None
+                if n >= self.n_stable and t is None:
+                    t = now
+                self._seen[p] = (k, n, t)
+                if t is None:
+                    continue
+
+                # .gps file comes right after its LID one, if ever
+                has_gps = os.path.exists(p.replace('.lid', '.gps'))
+                if has_gps or now - t >= self.gps_wait:
+                    rv.append((p, k))
+        return rv
+
+    async def _convert(self, sem, p, k):
+        try:
+            async with sem:
+                log.info(f'converting {p}')
+                loop = asyncio.get_running_loop()
+                ex = self._ex
+                r = await loop.run_in_executor(
+                    ex, _convert_one, p, self.engine, False, self.fmt,
+                    self.cache)
+        except BrokenProcessPool as e:
+            # a worker died, i.e. out of memory, the pool is of no use now,
+            # first task to know it replaces it for the next files
+            r = _result(p, f'{type(e).__name__}: {e}')
+            if self._ex is ex:
+                ex.shutdown(wait=False)
+                self._ex = ProcessPoolExecutor(max_workers=self.n_workers)
+        except (Exception, ) as e:
+            r = _result(p, f'{type(e).__name__}: {e}')
+        finally:
+            self._busy.discard(p)
+
+        # a failed file is not retried until it changes
+        self._done[p] = k
+        self._seen.pop(p, None)
+        g = p.replace('.lid', '.gps')
+        r['gps'] = g if os.path.exists(g) else None
+        r['lat'], r['lon'] = read_gps(g) if r['gps'] else (None, None)
+        if r['error']:
+            log.error(f"error, converting {p} -> {r['error']}")
+        else:
+            log.info(f"converted {p}, {r['n_samples']} samples, "
+                     f"{r['seconds']:.3f} s")
+
+        if self.events is not None:
+            if self.events.full():
+                self.events.get_nowait()
+                log.warning('watch events not consumed, dropped oldest one')
+            self.events.put_nowait(r)
+        if self.callback:
+            try:
+                v = self.callback(r)
+                if inspect.isawaitable(v):
+                    await v
+            except (Exception, ) as e:
+                log.error(f'error, watch callback for {p} -> {e}')
+
+    async def run(self):
+        # polls until stop() is called, then waits for running conversions
+        sem = asyncio.Semaphore(self.n_workers)
+        self._ex = ProcessPoolExecutor(max_workers=self.n_workers)
+        try:
+            while not self._stop.is_set():
+                for p, k in self._ready():
+                    self._busy.add(p)
+                    t = asyncio.create_task(self._convert(sem, p, k))
+                    self._tasks.add(t)
+                    t.add_done_callback(self._tasks.discard)
+                try:
+                    await asyncio.wait_for(self._stop.wait(), self.period)
+                except asyncio.TimeoutError:
+                    pass
+            if self._tasks:
+                await asyncio.gather(*self._tasks)
+        finally:
+            self._ex.shutdown()
+
+    def stop(self):
+        self._stop.set()
+
+
+
+async def watch(folders, callback=None, **kwargs):
+    # runs a WatchService forever, kwargs as WatchService ones
+    await WatchService(folders, callback, **kwargs).run()
+
+
+
+def main():
+    ap = argparse.ArgumentParser(description='convert LID files as they arrive')
+    ap.add_argument('folders', nargs='+')
+    ap.add_argument('-j', '--workers', type=int, default=None,
+                    help='conversions at the same time, default one per core')
+    ap.add_argument('--engine', default='numpy', choices=('numpy', 'sample'))
+    ap.add_argument('--fmt', default='csv', choices=('csv', 'npy'))
+    ap.add_argument('--period', type=float, default=WATCH_PERIOD,
+                    help='seconds between polls')
+    ap.add_argument('--no-cache', action='store_true',
+                    help='convert again files whose outputs are current')
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    def _print(r):
+        print(f"{r['path']}, {r['n_samples']} samples, gps {r['gps']}, "
+              f"{'error ' + r['error'] if r['error'] else 'ok'}")
+
+    try:
+        asyncio.run(watch(args.folders, _print, n_workers=args.workers,
+                          engine=args.engine, fmt=args.fmt,
+                          cache=not args.no_cache, period=args.period))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())